@@ -1,5 +1,11 @@
 """ Ratpy Command Bench module """
 
+import itertools
+import os
+import random
+import tempfile
+import time
+
 from scrapy.exceptions import UsageError
 
 from ratpy.commands import RatpyCommand, TestEnvironment, TestSpider, set_command
@@ -10,6 +16,8 @@ from ratpy.commands import RatpyCommand, TestEnvironment, TestSpider, set_comman
 NB_PAGE = 100
 NB_PAGE_LINK = 50
 
+BENCH_SIZES = '10000,100000,1000000'
+
 
 class Command(RatpyCommand):
 
@@ -45,6 +53,8 @@ class Command(RatpyCommand):
         parser.add_option('-m', '--max', dest='max', metavar='VALUE', default=0, help='max number of requests to bench (default: 10000)')
         parser.add_option('-f', '--filter', dest='filter', action='store_true', default=False, help='filter requests')
         parser.add_option('-i', '--interval', dest='interval', metavar='VALUE', default=0, help='override log stats extension interval')
+        parser.add_option('-t', '--target', dest='target', metavar='NAME', default='crawl', help='component to bench : {} (default: crawl)'.format(', '.join(['crawl'] + sorted(BENCHMARKS))))
+        parser.add_option('-s', '--sizes', dest='sizes', metavar='VALUES', default=BENCH_SIZES, help='comma separated sizes for component benchmarks (default: {})'.format(BENCH_SIZES))
 
     def process_options(self, args, opts):
         RatpyCommand.process_options(self, args, opts)
@@ -57,6 +67,16 @@ class Command(RatpyCommand):
         if opts.interval < 0:
             raise UsageError('Invalid interval value')
 
+        if opts.target != 'crawl' and opts.target not in BENCHMARKS:
+            raise UsageError('Invalid target value')
+
+        try:
+            opts.sizes = [int(size) for size in opts.sizes.split(',')]
+        except ValueError:
+            raise UsageError('Invalid sizes value')
+        if any(size <= 0 for size in opts.sizes):
+            raise UsageError('Invalid sizes value')
+
     # ####################################################### #
 
     def run(self, args, opts):
@@ -65,6 +85,12 @@ class Command(RatpyCommand):
         if opts.interval > 0:
             self.crawler_process.settings['LOG_STATS_INTERVAL'] = opts.interval
 
+        if opts.target != 'crawl':
+            crawler = BenchCrawler(self.crawler_process.settings)
+            for row in BENCHMARKS[opts.target](crawler, opts.sizes):
+                print('{:<24} {:>10} {:>12} {:>12} {:>12}'.format(*row))
+            return
+
         spider = '_'
         try:
             spider_cls = self.crawler_process.spider_loader.load(spider) if spider != '_' else BenchSpider
@@ -117,3 +143,410 @@ class BenchSpider(TestSpider):
 
 # ############################################################### #
 # ############################################################### #
+
+
+class BenchCrawler:
+
+    """ Minimal crawler used to instantiate components outside of a crawl """
+
+    settings = None
+    stats = None
+    spider = None
+
+    def __init__(self, settings):
+        from ratpy.config.stats import StatsCollector
+        self.settings = settings.copy()
+        self.settings['WORK_DIR'] = tempfile.mkdtemp(prefix='ratpy-bench-')
+        self.settings['WORK_ON_DISK'] = True
+        self.settings['LOG_IN_FILES'] = False
+        self.settings['LOG_IN_ONE_FILE'] = False
+        self.settings['MONITOR_ENABLED'] = False
+        self.stats = StatsCollector(self)
+
+
+def _timeit(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def _rate(count, duration):
+    return '{:.0f}/s'.format(count / duration) if duration else '-'
+
+# ############################################################### #
+
+
+BENCH_LIST_QUEUE_MAX = 10000
+
+
+def bench_memory_queues(crawler, sizes):
+
+    from ratpy.config.scheduler.queues.heapqueue import RatpyHeapQueue
+    from ratpy.config.scheduler.queues.listqueue import RatpyListQueue
+
+    yield ('QUEUE', 'SIZE', 'PUSH', 'POP', 'TOTAL')
+
+    now = time.time()
+    for size in sizes:
+        timestamps = [now - random.random() * 3600 for _ in range(size)]
+        for queue_cls in (RatpyListQueue, RatpyHeapQueue):
+            if queue_cls is RatpyListQueue and size > BENCH_LIST_QUEUE_MAX:
+                yield (queue_cls.__name__, size, 'skipped', 'skipped', 'skipped')
+                continue
+
+            queue = queue_cls(crawler, 'bench', 0)
+            queue.open()
+
+            def push():
+                for i, timestamp in enumerate(timestamps):
+                    queue.push(i, timestamp)
+
+            def pop():
+                while queue.pop() is not None:
+                    pass
+
+            push_time = _timeit(push)
+            pop_time = _timeit(pop)
+            queue.close()
+            yield (queue_cls.__name__, size, _rate(size, push_time), _rate(size, pop_time), '{:.3f}s'.format(push_time + pop_time))
+
+# ############################################################### #
+
+
+BENCH_DISK_QUEUE_MODES = {
+    'transaction': {'batch_size': 0, 'prefetch': 0},
+    'batched': {'batch_size': 1000, 'prefetch': 1000, 'synchronous': 'NORMAL'}
+}
+
+
+def bench_disk_queues(crawler, sizes):
+
+    from ratpy.config.scheduler.queues.sqlqueue import RatpySQLQueue
+
+    yield ('QUEUE', 'SIZE', 'PUSH', 'POP', 'TOTAL')
+
+    now = time.time()
+    data = b'x' * 512
+    for size in sizes:
+        timestamps = [now - random.random() * 3600 for _ in range(size)]
+        for mode, kwargs in BENCH_DISK_QUEUE_MODES.items():
+            queue = RatpySQLQueue(crawler, 'bench', '{}.{}'.format(mode, size), **kwargs)
+            queue.open()
+
+            def push():
+                for timestamp in timestamps:
+                    queue.push(data, timestamp)
+
+            def pop():
+                while queue.pop() is not None:
+                    pass
+
+            push_time = _timeit(push)
+            pop_time = _timeit(pop)
+            queue.close()
+            yield ('RatpySQLQueue.' + mode, size, _rate(size, push_time), _rate(size, pop_time), '{:.3f}s'.format(push_time + pop_time))
+
+# ############################################################### #
+
+
+BENCH_PRIORITIES = 100
+BENCH_DUE_RATIOS = (0.05, 0.9)
+BENCH_EMPTY_POLLS = 1000
+
+
+def bench_priority_queues(crawler, sizes):
+
+    import ratpy
+    from ratpy.config.scheduler.queues import RatpyPriorityQueue, RatpyFrontierQueue, RatpyDiskQueue, RatpyDiskFrontier
+
+    class LegacyPriorityQueue(RatpyPriorityQueue):
+
+        def pop(self):
+            for priority in sorted(self.queues):
+                if len(self.queues[priority]):
+                    request = self.queues[priority].pop()
+                    if request is not None:
+                        return request
+            return None
+
+    yield ('QUEUE', 'SIZE', 'PUSH', 'POP', 'TOTAL')
+
+    now = time.time()
+    for size, due_ratio in itertools.product(sizes, BENCH_DUE_RATIOS):
+        requests = []
+        for i in range(size):
+            due = random.random() < due_ratio
+            timestamp = now - random.random() * 3600 if due else now + random.random() * 30 * 24 * 3600
+            requests.append(ratpy.Request(url='{}?page={}'.format(crawler.settings.get('TEST_SERVER_URL'), i), priority=random.randrange(BENCH_PRIORITIES), timestamp=timestamp))
+
+        for queue_cls, queues_cls in ((LegacyPriorityQueue, RatpyDiskQueue), (RatpyPriorityQueue, RatpyDiskQueue), (RatpyFrontierQueue, RatpyDiskFrontier)):
+            name = '{}.due{:.0f}'.format(queue_cls.__name__, due_ratio * 100)
+            queue = queue_cls(crawler, 'disk', queues_cls, os.path.join('bench', name, str(size)))
+            queue.open()
+
+            def push():
+                for request in requests:
+                    queue.push(request)
+
+            def pop():
+                while queue.pop() is not None:
+                    pass
+                for _ in range(BENCH_EMPTY_POLLS):
+                    queue.pop()
+
+            push_time = _timeit(push)
+            pop_time = _timeit(pop)
+            queue.close()
+            yield (name, size, _rate(size, push_time), '{:.3f}s'.format(pop_time), '{:.3f}s'.format(push_time + pop_time))
+
+# ############################################################### #
+
+
+def bench_codecs(crawler, sizes):
+
+    import pickle
+
+    import ratpy
+    from ratpy.config.scheduler.queues import _pickle_serialize
+    from ratpy.config.scheduler.queues.codec import RatpyRequestCodec
+    from ratpy.http.request.serialize import request_to_dict, request_from_dict
+
+    codecs = {
+        'pickle': (lambda r: _pickle_serialize(request_to_dict(r)), lambda d: request_from_dict(pickle.loads(d))),
+        'RatpyRequestCodec': None
+    }
+
+    yield ('CODEC', 'SIZE', 'BYTES/REQ', 'ENCODE', 'DECODE')
+
+    headers = {'Authorization': 'Bearer ' + 'x' * 64, 'Accept': 'application/json'}
+    for size in sizes:
+        requests = []
+        for i in range(size):
+            request = ratpy.Request(
+                url='https://api.genius.com/artists/{}/songs?page={}'.format(i % 1000, i),
+                headers=headers if i % 2 else dict(headers, Referer='https://api.genius.com/artists/{}/songs?page={}'.format(i % 1000, i - 1)),
+                priority=random.randrange(10),
+                timestamp=time.time() + random.random() * 3600,
+                cb_kwargs={'artist': 'artist_{}'.format(i % 1000)}
+                )
+            requests.append(request)
+
+        for name, functions in codecs.items():
+            if functions is None:
+                codec = RatpyRequestCodec()
+                functions = (codec.encode, codec.decode)
+            encode, decode = functions
+            encoded = []
+
+            def _encode():
+                for request in requests:
+                    encoded.append(encode(request))
+
+            def _decode():
+                for data in encoded:
+                    decode(data)
+
+            encode_time = _timeit(_encode)
+            decode_time = _timeit(_decode)
+            yield (name, size, '{:.0f}'.format(sum(len(x) for x in encoded) / size), _rate(size, encode_time), _rate(size, decode_time))
+
+# ############################################################### #
+
+
+BENCH_FINGERPRINTERS = {
+    'sha1': {},
+    'blake2b.16': {'algorithm': 'blake2b', 'digest_size': 16},
+    'blake2b.8': {'algorithm': 'blake2b', 'digest_size': 8}
+}
+
+
+def _test_server_pages(crawler, count):
+
+    from scrapy.http import HtmlResponse
+    from ratpy.utils.server import TestServer
+
+    class _Request:
+
+        def __init__(self, args):
+            self.args = args
+            self.body = []
+
+        def write(self, data):
+            self.body.append(data)
+
+    server = TestServer()
+    server_url = crawler.settings.get('TEST_SERVER_URL')
+    args = {b'nb_pages': [crawler.settings.get('TEST_SERVER_NB_PAGES')], b'nb_page_links': [crawler.settings.get('TEST_SERVER_NB_PAGE_LINKS')]}
+    for page in range(count):
+        request = _Request({**args, b'page': [page]})
+        server.render(request)
+        yield HtmlResponse(url='{}/?page={}'.format(server_url, page), body=b''.join(request.body))
+
+
+def bench_fingerprints(crawler, sizes):
+
+    import hashlib
+
+    import ratpy
+    from scrapy.linkextractors import LinkExtractor
+    from w3lib.url import canonicalize_url
+
+    from ratpy.http.request.fingerprint import RequestFingerprinter
+
+    def legacy_fingerprint(request):
+        _fp = hashlib.sha1()
+        _fp.update(canonicalize_url(request.url, keep_fragments=False, keep_blank_values=False).encode())
+        _fp.update(str(request.timestamp).encode())
+        _fp.update(request.body or b'')
+        return _fp.hexdigest()
+
+    yield ('FINGERPRINT', 'REQUESTS', 'DISTINCT', 'RATE', 'TOTAL')
+
+    link_extractor = LinkExtractor()
+    for size in sizes:
+        requests = []
+        for response in _test_server_pages(crawler, max(size // int(crawler.settings.get('TEST_SERVER_NB_PAGE_LINKS')), 1)):
+            requests.extend(ratpy.Request(url=link.url) for link in link_extractor.extract_links(response))
+        requests = requests[:size]
+
+        fingerprinters = {'legacy': legacy_fingerprint}
+        for name, kwargs in BENCH_FINGERPRINTERS.items():
+            fingerprinters[name] = RequestFingerprinter(**kwargs).fingerprint
+
+        for name, fingerprint in fingerprinters.items():
+            fingerprints = set()
+
+            def run():
+                for request in requests:
+                    fingerprints.add(fingerprint(request))
+
+            duration = _timeit(run)
+            yield (name, len(requests), len(fingerprints), _rate(len(requests), duration), '{:.3f}s'.format(duration))
+
+# ############################################################### #
+
+
+def bench_urls(crawler, sizes):
+
+    import re
+    import tracemalloc
+
+    from scrapy.linkextractors import LinkExtractor
+
+    from ratpy.http.url import URL
+
+    def remove_protocol(path):
+        search = re.search('[a-zA-Z]+://', path)
+        return path[search.end():] if search else path
+
+    class LegacyURL(str):
+
+        def __new__(cls, url, remaining=None):
+            path = URL.extract_path(url)
+            params = URL.extract_params(url)
+            self = str.__new__(cls, URL._url(path, params))
+            self._domain = remove_protocol(url or '').split('/', 1)[0]
+            self._path = path
+            self._params = params
+            self._remaining = remaining if remaining is not None else remove_protocol(path)
+            return self
+
+        @property
+        def remaining(self):
+            return self._remaining
+
+    yield ('URL', 'SIZE', 'NEW', 'REWRAP', 'BYTES/URL')
+
+    link_extractor = LinkExtractor()
+    for size in sizes:
+        links = []
+        for response in _test_server_pages(crawler, max(size // int(crawler.settings.get('TEST_SERVER_NB_PAGE_LINKS')), 1)):
+            links.extend(link.url for link in link_extractor.extract_links(response))
+        links = links[:size]
+
+        for name, cls in (('legacy', LegacyURL), ('URL', URL)):
+            urls = []
+
+            def new():
+                for link in links:
+                    urls.append(cls(link))
+
+            def rewrap():
+                for url in urls:
+                    cls(url, remaining=url.remaining[4:])
+
+            new_time = _timeit(new)
+            rewrap_time = _timeit(rewrap)
+
+            urls.clear()
+            tracemalloc.start()
+            new()
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            yield (name, len(links), _rate(len(links), new_time), _rate(len(links), rewrap_time), '{:.0f}'.format(memory / len(links)))
+
+# ############################################################### #
+
+
+def bench_logger(crawler, sizes):
+
+    import logging
+
+    import ratpy
+    from ratpy.utils import Logger
+
+    class BenchLogger(Logger):
+        name = 'ratpy.bench.logger'
+
+    logger = BenchLogger(crawler).logger
+    logging.getLogger(logger._logger.name).setLevel(crawler.settings.get('LOG_LEVEL'))  # pylint: disable=protected-access
+
+    request = ratpy.Request(url='https://api.genius.com/artists/1/songs?page=2')
+    url = request.parsed_url
+
+    # legacy : message formatted by the caller, then again before the level check
+    calls = {
+        'scheduler': (
+            lambda: logger._log(logging.DEBUG, action='Enqueue', status='OK', message='[{: <8}] {}'.format('DISK', request.url)),  # pylint: disable=protected-access
+            lambda: logger.debug(action='Enqueue', status='OK', message='[{: <8}] {}', message_args=('DISK', request.url))
+            ),
+        'middleware': (
+            lambda: logger._log(logging.DEBUG, action='Process Request', status='DROP', message='{} --> {}'.format(url, request.url)),  # pylint: disable=protected-access
+            lambda: logger.debug(action='Process Request', status='DROP', message='{} --> {}', message_args=(url, request.url))
+            ),
+        'queue': (
+            lambda: logger._log(logging.DEBUG, action='Push', status='OK', message='[{}] {}'.format(3, request.url)),  # pylint: disable=protected-access
+            lambda: logger.debug(action='Push', status='OK', message='[{}] {}', message_args=(3, request.url))
+            ),
+        'checker': (
+            lambda: logger._log(logging.DEBUG, action='User function', status='OK', message='[{}] --> {}'.format('parse', url.__class__.__name__)),  # pylint: disable=protected-access
+            lambda: logger.debug(action='User function', status='OK', message='[{}] --> {}', message_args=('parse', url.__class__.__name__))
+            ),
+    }
+
+    yield ('DEBUG CALL', 'CALLS', 'LEGACY', 'LAZY', 'LEVEL')
+
+    for size in sizes:
+        for name, (legacy, lazy) in calls.items():
+
+            def run(call):
+                for _ in range(size):
+                    call()
+
+            yield (name, size, _rate(size, _timeit(run, legacy)), _rate(size, _timeit(run, lazy)), crawler.settings.get('LOG_LEVEL'))
+
+# ############################################################### #
+
+
+BENCHMARKS = {
+    'queues': bench_memory_queues,
+    'disk': bench_disk_queues,
+    'priority': bench_priority_queues,
+    'codec': bench_codecs,
+    'fingerprint': bench_fingerprints,
+    'url': bench_urls,
+    'logger': bench_logger,
+}
+
+# ############################################################### #
+# ############################################################### #
@@ -116,7 +116,7 @@ class MemoryUsage(Logger):
         self.logger.debug(action='Check Warning')
 
         if self.warned:
-            self.logger.debug(action='Check Warning', status='OK', message='[{}]'.format('ALREADY REACHED'))
+            self.logger.debug(action='Check Warning', status='OK', message='[ALREADY REACHED]')
             return
 
         if MemoryUsage.get_virtual_size() > self.warning:
@@ -133,9 +133,9 @@ class MemoryUsage(Logger):
 
             self.warned = True
 
-            self.logger.debug(action='Check Warning', status='OK', message='[{}]'.format('REACHED'))
+            self.logger.debug(action='Check Warning', status='OK', message='[REACHED]')
         else:
-            self.logger.debug(action='Check Warning', status='OK', message='[{}]'.format('NOT REACHED'))
+            self.logger.debug(action='Check Warning', status='OK', message='[NOT REACHED]')
 
     def _check_limit(self):
         self.logger.debug(action='Check Limit')
@@ -160,9 +160,9 @@ class MemoryUsage(Logger):
             else:
                 self.crawler.stop()
 
-            self.logger.debug(action='Check Limit', status='OK', message='[{}]'.format('REACHED'))
+            self.logger.debug(action='Check Limit', status='OK', message='[REACHED]')
         else:
-            self.logger.debug(action='Check Limit', status='OK', message='[{}]'.format('NOT REACHED'))
+            self.logger.debug(action='Check Limit', status='OK', message='[NOT REACHED]')
 
     # ####################################################### #
 
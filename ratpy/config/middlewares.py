@@ -3,7 +3,7 @@
 import scrapy
 
 from ratpy.utils import Logger, monitored
-from ratpy import URL, Item
+from ratpy import Item
 
 from ratpy.http.request import Request, IgnoreRequest
 from ratpy.http.response import Response, IgnoreResponse
@@ -68,32 +68,32 @@ class RatpyDownloaderMiddleware(Logger):
     # ####################################################### #
 
     def process_request(self, request, spider):
-        self.logger.debug(action='Process Request', message='{}'.format(request.url))
+        self.logger.debug(action='Process Request', message='{}', message_args=(request.url,))
 
         if spider.name not in self.spiders:
             self.logger.error(action='Process Request', status='FAIL', message='[{}]'.format(spider.name))
             raise RuntimeError('{} middleware not running !'.format(spider.name))
         request.__class__ = Request
 
-        url = URL(request.url)
+        source, url = request.url, request.parsed_url
         try:
             request = spider.subspiders.process_request_(request, url, **request.cb_kwargs)
             if request is None:
                 raise IgnoreRequest
         except IgnoreRequest:
-            self.logger.debug(action='Process Request', status='DROP', message='{}'.format(request.url))
+            self.logger.debug(action='Process Request', status='DROP', message='{}', message_args=(request.url,))
             raise scrapy.exceptions.IgnoreRequest
         else:
-            if url == URL(request.url):
-                self.logger.debug(action='Process Request', status='OK', message='{}'.format(request.url))
+            if request.url == source or url == request.parsed_url:
+                self.logger.debug(action='Process Request', status='OK', message='{}', message_args=(request.url,))
                 request = None
             else:
-                self.logger.debug(action='Process Request', status='DROP', message='{} --> {}'.format(url, request.url))
+                self.logger.debug(action='Process Request', status='DROP', message='{} --> {}', message_args=(url, request.url))
 
         return request
 
     def process_response(self, request, response, spider):
-        self.logger.debug(action='Process Response', message='{}'.format(request.url))
+        self.logger.debug(action='Process Response', message='{}', message_args=(request.url,))
 
         if spider.name not in self.spiders:
             self.logger.error(action='Process Response', status='FAIL', message='[{}]'.format(spider.name))
@@ -101,21 +101,23 @@ class RatpyDownloaderMiddleware(Logger):
         request.__class__ = Request
         response.__class__ = Response
 
-        url = URL(response.url)
+        if response.request is None:
+            response.request = request
+        url = response.parsed_url
         try:
             response = spider.subspiders.process_response_(response, url, **request.cb_kwargs)
             if response is None:
                 raise IgnoreResponse
         except IgnoreResponse:
-            self.logger.debug(action='Process Response', status='DROP', message='{}'.format(request.url))
+            self.logger.debug(action='Process Response', status='DROP', message='{}', message_args=(request.url,))
             raise scrapy.exceptions.IgnoreRequest
         else:
-            self.logger.debug(action='Process Response', status='OK', message='{}'.format(request.url))
+            self.logger.debug(action='Process Response', status='OK', message='{}', message_args=(request.url,))
 
         return response
 
     def process_exception(self, request, exception, spider):
-        self.logger.debug(action='Process Exception', status='OK', message='[{}] {}'.format(exception, request.url))
+        self.logger.debug(action='Process Exception', status='OK', message='[{}] {}', message_args=(exception, request.url))
 
     # ####################################################### #
     # ####################################################### #
@@ -186,7 +188,7 @@ class RatpySpiderMiddleware(Logger):
             raise RuntimeError("{} middleware not running !".format(spider.name))
 
         spider.crawler.stats.inc_value(spider.name + '/inputs')
-        self.logger.debug(action='Process Input', status='OK', message='[{: <8}] {}'.format('Response', response.url))
+        self.logger.debug(action='Process Input', status='OK', message='[{: <8}] {}', message_args=('Response', response.url))
 
     def process_spider_output(self, response, result, spider):
 
@@ -198,14 +200,14 @@ class RatpySpiderMiddleware(Logger):
             spider.crawler.stats.inc_value(spider.name + '/outputs')
             if isinstance(hit, Item):
                 spider.crawler.stats.inc_value(spider.name+'/outputs/items')
-                self.logger.debug(action='Process Output', status='OK', message='[{: <8}]'.format('Item'))
+                self.logger.debug(action='Process Output', status='OK', message='[Item    ]')
             elif isinstance(hit, Request):
                 spider.crawler.stats.inc_value(spider.name+'/outputs/requests')
-                self.logger.debug(action='Process Output', status='OK', message='[{: <8}] {}'.format('Item', hit.url))
+                self.logger.debug(action='Process Output', status='OK', message='[{: <8}] {}', message_args=('Item', hit.url))
             yield hit
 
     def process_spider_exception(self, response, exception, spider):
-        self.logger.debug(action='Process Exception', status='OK', message='[{}] {}'.format(exception, response.url))
+        self.logger.debug(action='Process Exception', status='OK', message='[{}] {}', message_args=(exception, response.url))
 
     def process_start_requests(self, start_requests, spider):
         yield from start_requests
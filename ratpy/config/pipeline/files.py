@@ -103,7 +103,7 @@ class FilesPipeline(MediaPipeline):
             if age > self.expires >= 0:
                 return  # returning None force download
 
-            self.logger.debug(action='Download '+self.MEDIA_NAME, status='SKIP', message='{}'.format(request.url))
+            self.logger.debug(action='Download '+self.MEDIA_NAME, status='SKIP', message='{}', message_args=(request.url,))
             self.inc_stats('up_to_date')
 
             checksum = result.get('checksum', None)
@@ -138,7 +138,7 @@ class FilesPipeline(MediaPipeline):
         try:
             path = self.file_path(request)
             checksum = self.file_downloaded(response, request)
-            self.logger.debug(action='Process ' + self.MEDIA_NAME, status='OK', message='{}'.format(request.url))
+            self.logger.debug(action='Process ' + self.MEDIA_NAME, status='OK', message='{}', message_args=(request.url,))
         except Exception as e:
             self.logger.error(action='Process ' + self.MEDIA_NAME, status='FAIL', message='{}'.format(request.url))
             raise FileException(str(e))
@@ -62,7 +62,7 @@ class RatpyItemPipeline(Logger):
     # ####################################################### #
 
     def process_item(self, item, spider):
-        self.logger.debug(action='Process Item', status='OK', message='[{}]'.format(item['pipeline']))
+        self.logger.debug(action='Process Item', status='OK', message='[{}]', message_args=(item['pipeline'],))
         return item
 
     # ####################################################### #
@@ -2,12 +2,15 @@
 
 import os
 import json
+import time
+
+from datetime import datetime
 
 from ratpy.utils import Logger, monitored, load_object, create_instance
 from ratpy.utils.path import work_directory, create_file
 
-from ratpy.http.url import URL
 from ratpy.http.request import Request, IgnoreRequest
+from ratpy.http.request.serialize import register_callbacks
 
 # ############################################################### #
 # ############################################################### #
@@ -37,9 +40,14 @@ class RatpyScheduler(Logger):
     q_memory_cls = None
     q_memory = None
 
+    q_disk_priority_cls = None
     q_disk_cls = None
     q_disk = None
 
+    _sleep_start = None
+    _sleep_until = None
+    _wake_up_call = None
+
     # ####################################################### #
 
     def __init__(self, crawler, dupefilter_class, queues_classes=None):
@@ -54,6 +62,7 @@ class RatpyScheduler(Logger):
 
         self.q_priority_cls = queues_classes['priority']
         self.q_memory_cls = queues_classes['memory']
+        self.q_disk_priority_cls = queues_classes.get('disk_priority', self.q_priority_cls)
         self.q_disk_cls = queues_classes['disk']
 
         self.q_disk = self._disk_queue()
@@ -66,6 +75,7 @@ class RatpyScheduler(Logger):
         dupefilter_class = load_object(crawler.settings['DUPEFILTER_CLASS'])
         queues_classes = {
             'priority': load_object(crawler.settings['SCHEDULER_PRIORITY_QUEUE']),
+            'disk_priority': load_object(crawler.settings.get('SCHEDULER_DISK_PRIORITY_QUEUE') or crawler.settings['SCHEDULER_PRIORITY_QUEUE']),
             'memory': load_object(crawler.settings['SCHEDULER_MEMORY_QUEUE']),
             'disk': load_object(crawler.settings['SCHEDULER_DISK_QUEUE'])
         }
@@ -82,14 +92,26 @@ class RatpyScheduler(Logger):
             'disk': self.q_disk.infos if self.q_disk is not None else {}
             }
         infos['dupefilter'] = self.dupefilter.infos
+        infos['next_timestamp'] = self.next_timestamp
+        infos['sleep_until'] = self._sleep_until
         return infos
 
+    @property
+    def next_timestamp(self):
+        timestamps = []
+        if self.q_memory is not None:
+            timestamps.append(self.q_memory.next_timestamp)
+        if self.q_disk is not None and self.crawler.settings.get('WORK_ON_DISK', False):
+            timestamps.append(self.q_disk.next_timestamp)
+        return min(filter(lambda t: t is not None, timestamps), default=None)
+
     # ####################################################### #
 
     def open(self, spider, *args, **kwargs):
         self.logger.debug(action='Open')
 
         self.spider = spider
+        register_callbacks(self.spider)
 
         if self.q_disk is not None:
             self.q_disk.open()
@@ -108,6 +130,8 @@ class RatpyScheduler(Logger):
     def close(self, reason, *args, **kwargs):
         self.logger.debug(action='Close')
 
+        self._wake_up(schedule=False)
+
         self.dupefilter.close(reason)
 
         if self.q_disk is not None:
@@ -141,35 +165,40 @@ class RatpyScheduler(Logger):
             if self._disk_queue_push(req):
                 self.crawler.stats.inc_value('scheduler/queues/push/disk', spider=self.spider)
                 self.crawler.stats.inc_value('scheduler/queues/push', spider=self.spider)
-                self.logger.debug(action='Enqueue', status='OK', message='[{: <8}] {}'.format('DISK', req.url))
+                self.logger.debug(action='Enqueue', status='OK', message='[{: <8}] {}', message_args=('DISK', req.url))
                 return True
 
             if self._memory_queue_push(req):
                 self.crawler.stats.inc_value('scheduler/queues/push/memory', spider=self.spider)
                 self.crawler.stats.inc_value('scheduler/queues/push', spider=self.spider)
-                self.logger.debug(action='Enqueue', status='OK', message='[{: <8}] {}'.format('MEMORY', req.url))
+                self.logger.debug(action='Enqueue', status='OK', message='[{: <8}] {}', message_args=('MEMORY', req.url))
                 return True
 
-            self.logger.debug(action='Enqueue', status='NO', message='[{: <8}] {}'.format('NO QUEUE', req.url))
+            self.logger.debug(action='Enqueue', status='NO', message='[{: <8}] {}', message_args=('NO QUEUE', req.url))
             return False
 
+        def _enqueued(req):
+            if self._sleep_until is not None and (req.timestamp or 0) < self._sleep_until:
+                self._wake_up()
+            return True
+
         if not request.dont_filter:
 
             if self.dupefilter.seen(request):
                 self.crawler.stats.inc_value('scheduler/filtered', spider=self.spider)
-                self.logger.debug(action='Enqueue', status='NO', message='[{: <8}] {}'.format('SEEN', request.url))
+                self.logger.debug(action='Enqueue', status='NO', message='[{: <8}] {}', message_args=('SEEN', request.url))
                 return False
             else:
                 request.__class__ = Request
-                url = URL(request.url)
+                url = request.parsed_url
                 try:
                     if not self.spider.subspiders.enqueue_request_(request, url, **request.cb_kwargs):
                         raise IgnoreRequest
                 except IgnoreRequest:
-                    self.logger.debug(action='Enqueue', status='NO', message='[{: <8}] {}'.format('IGNORE', request.url))
+                    self.logger.debug(action='Enqueue', status='NO', message='[{: <8}] {}', message_args=('IGNORE', request.url))
                     return False
 
-        return _enqueue(request)
+        return _enqueue(request) and _enqueued(request)
 
     # ####################################################### #
 
@@ -181,26 +210,74 @@ class RatpyScheduler(Logger):
             if req:
                 self.crawler.stats.inc_value('scheduler/queues/pop/memory', spider=self.spider)
                 self.crawler.stats.inc_value('scheduler/queues/pop', spider=self.spider)
-                self.logger.debug(action='Next', status='OK', message='[{: <8}] {}'.format('MEMORY', req.url))
+                self.logger.debug(action='Next', status='OK', message='[{: <8}] {}', message_args=('MEMORY', req.url))
                 return req
 
             req = self._disk_queue_pop()
             if req:
                 self.crawler.stats.inc_value('scheduler/queues/pop/disk', spider=self.spider)
                 self.crawler.stats.inc_value('scheduler/queues/pop', spider=self.spider)
-                self.logger.debug(action='Next', status='OK', message='[{: <8}] {}'.format('DISK', req.url))
+                self.logger.debug(action='Next', status='OK', message='[{: <8}] {}', message_args=('DISK', req.url))
                 return req
 
-            self.logger.debug(action='Next', status='NO', message='[{: <8}]'.format('EMPTY'))
+            self.logger.debug(action='Next', status='NO', message='[EMPTY   ]')
+            self._sleep()
             return None
 
         if self.crawler.settings.get('COMMAND') == 'infos':
             return None
 
+        if self._sleeping():
+            return None
+
         return _next()
 
     # ####################################################### #
 
+    def _sleeping(self):
+        if self._sleep_until is None:
+            return False
+        if self._sleep_until > time.time():
+            return True
+        self._wake_up(schedule=False)
+        return False
+
+    def _sleep(self):
+        from twisted.internet import reactor
+
+        now = time.time()
+        next_timestamp = self.next_timestamp
+        if next_timestamp is None or next_timestamp <= now:
+            return
+
+        self._sleep_start = now
+        self._sleep_until = next_timestamp
+        self._wake_up_call = reactor.callLater(next_timestamp - now, self._wake_up)
+
+        self.crawler.stats.inc_value('scheduler/sleep/count', spider=self.spider)
+        self.logger.info(action='Sleep', status='OK', message='Until {} [{:.0f}s]'.format(datetime.fromtimestamp(next_timestamp).strftime('%Y-%m-%d %H:%M:%S'), next_timestamp - now))
+
+    def _wake_up(self, schedule=True):
+        if self._sleep_until is None:
+            return
+
+        if self._wake_up_call is not None and self._wake_up_call.active():
+            self._wake_up_call.cancel()
+
+        slept = time.time() - self._sleep_start
+        self._sleep_start = None
+        self._sleep_until = None
+        self._wake_up_call = None
+
+        self.crawler.stats.inc_value('scheduler/sleep/seconds', int(round(slept)), spider=self.spider)
+        self.logger.info(action='Wake Up', status='OK', message='[{:.0f}s]'.format(slept))
+
+        slot = getattr(self.crawler.engine, 'slot', None) if schedule else None
+        if slot is not None:
+            slot.nextcall.schedule()
+
+    # ####################################################### #
+
     def _memory_queue(self):
         return create_instance(self.q_priority_cls, settings=None, crawler=self.crawler, type='memory', queues_cls=self.q_memory_cls, dir=os.path.join(self.directory, 'queues'))
 
@@ -223,7 +300,7 @@ class RatpyScheduler(Logger):
 
     def _disk_queue(self):
         state = self._read_disk_queue_state()
-        return create_instance(self.q_priority_cls, settings=None, crawler=self.crawler, type='disk', queues_cls=self.q_disk_cls, dir=os.path.join(self.directory, 'queues'), start_prios=state)
+        return create_instance(self.q_disk_priority_cls, settings=None, crawler=self.crawler, type='disk', queues_cls=self.q_disk_cls, dir=os.path.join(self.directory, 'queues'), start_prios=state)
 
     def _disk_queue_push(self, request):
         if self.q_disk is None or not self.crawler.settings.get('WORK_ON_DISK', False):
@@ -0,0 +1,214 @@
+"""Ratpy Dupefilter module """
+
+import os
+
+from ratpy.utils import Logger, monitored, create_instance
+from ratpy.utils.path import work_directory
+from ratpy.http.request.fingerprint import RequestFingerprinter
+from ratpy.config.scheduler.dupefilter.journal import FingerprintJournal
+
+# ############################################################### #
+# ############################################################### #
+
+
+@monitored
+class RatpyDupefilter(Logger):
+
+    """ Ratpy Dupefilter class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    name = 'ratpy.dupefilter'
+
+    directory = None
+    crawler = None
+    spider = None
+
+    work_file = None
+    journal = None
+    journal_name = 'requests.journal'
+    record_size = None
+    compact_ratio = None
+
+    fingerprinter = None
+
+    fingerprints = None
+
+    # ####################################################### #
+
+    def __init__(self, crawler, directory):
+
+        self.directory = os.path.join(directory, 'dupefilter')
+        self.crawler = crawler
+        Logger.__init__(self, self.crawler, directory=self.directory)
+
+        settings = self.crawler.settings
+        self.fingerprinter = create_instance(RequestFingerprinter, settings, None)
+        self.record_size = self._record_size()
+        self.work_file = os.path.join(work_directory(settings), self.directory, self.journal_name)
+        self.journal = FingerprintJournal(
+            self.work_file,
+            self.record_size,
+            batch_size=settings.getint('DUPEFILTER_JOURNAL_BATCH_SIZE', 1000),
+            batch_interval=settings.getint('DUPEFILTER_JOURNAL_BATCH_INTERVAL', 1000),
+            fsync=settings.getbool('DUPEFILTER_JOURNAL_FSYNC', True)
+            )
+        self.compact_ratio = settings.getfloat('DUPEFILTER_JOURNAL_COMPACT_RATIO', 2.0)
+        self.fingerprints = set()
+
+        self.logger.debug(action='Initialisation', status='OK')
+
+    @classmethod
+    def from_crawler(cls, crawler, directory):
+        return cls(crawler, directory)
+
+    # ####################################################### #
+
+    def open(self, spider, *args, **kwargs):
+        self.logger.debug(action='Open')
+
+        self.spider = spider
+
+        if self.crawler.settings.get('WORK_ON_DISK', False):
+            self.fingerprints.update(self._open_journal())
+            self._import_history()
+            self._compact_if_needed()
+
+        self.logger.info(action='Open', status='OK', message='[{}] Requests : {}'.format(self.spider.name, len(self)))
+
+    def close(self, reason, *args, **kwargs):
+        self.logger.debug(action='Close')
+
+        if self.crawler.settings.get('WORK_ON_DISK', False):
+            self.journal.flush()
+            self._compact_if_needed()
+            self.journal.close()
+
+        self.logger.info(action='Close', status='OK', message='[{}] Requests : {}'.format(self.spider.name, len(self)))
+
+    # ####################################################### #
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    @property
+    def infos(self):
+        infos = super().infos
+        infos['work_file'] = self.work_file
+        infos['filtered'] = len(self)
+        infos['journal'] = self.journal.infos
+        infos['compact_ratio'] = self.compact_ratio
+        infos['fingerprinter'] = self.fingerprinter.infos
+        return infos
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def seen(self, request):
+
+        self.crawler.stats.inc_value('scheduler/dupefilter/inputs', spider=self.spider)
+
+        _fp = self.fingerprint(request)
+        if _fp in self.fingerprints:
+            self.logger.debug(action='Filter', status='OK', message='[{}]', message_args=(request.url,))
+            return True
+
+        self.fingerprints.add(_fp)
+        self._journalize(_fp)
+
+        self.crawler.stats.inc_value('scheduler/dupefilter/outputs', spider=self.spider)
+        return False
+
+    def fingerprint(self, request):
+        return self.fingerprinter.fingerprint(request)
+
+    def log(self, request, spider):
+        pass
+
+    # ####################################################### #
+
+    def _record_size(self):
+        return self.fingerprinter.digest_size
+
+    def _records(self):
+        return iter(self.fingerprints)
+
+    def _journalize(self, record):
+        if not self.journal.opened:
+            return
+        self.journal.append(record)
+        if self.journal.flush_if_needed():
+            self.crawler.stats.inc_value('scheduler/dupefilter/journal/flushes', spider=self.spider)
+            self._compact_if_needed()
+
+    def _compact_if_needed(self):
+        if len(self.journal) > max(self.compact_ratio * len(self), len(self) + self.journal.batch_size):
+            self.logger.debug(action='Compact', message='{} -> {}', message_args=(len(self.journal), len(self)))
+            self.journal.compact(self._records())
+            self.crawler.stats.inc_value('scheduler/dupefilter/journal/compactions', spider=self.spider)
+            self.logger.debug(action='Compact', status='OK')
+
+    def _open_journal(self):
+        records = self.journal.open()
+        if self.journal.discarded:
+            self.crawler.stats.inc_value('scheduler/dupefilter/journal/discarded', spider=self.spider)
+            self.logger.warning(action='Open', status='FAIL', message='[{}] {} : invalid journal header, kept in {}', message_args=(self.spider.name, self.journal.path, self.journal.discarded))
+        return records
+
+    def _import_history(self):
+        self._import_base_journal()
+        self._import_legacy_file()
+
+    def _import(self, fingerprint):
+        if fingerprint not in self.fingerprints:
+            self.fingerprints.add(fingerprint)
+            self.journal.append(fingerprint)
+
+    def _import_base_journal(self):
+        # Another dupefilter taking over the directory of the default one starts from its journal
+        base_file = os.path.join(os.path.dirname(self.work_file), RatpyDupefilter.journal_name)
+        if base_file == self.work_file or not os.path.exists(base_file):
+            return
+        journal = FingerprintJournal(base_file, self.fingerprinter.digest_size, batch_size=1)
+        records = journal.open()
+        journal.close()
+        if journal.discarded:
+            self.crawler.stats.inc_value('scheduler/dupefilter/journal/discarded', spider=self.spider)
+            self.logger.warning(action='Import', status='FAIL', message='[{}] {} : invalid journal header, kept in {}', message_args=(self.spider.name, base_file, journal.discarded))
+        for record in records:
+            self._import(record)
+        self.journal.flush()
+        os.remove(base_file)
+        self.logger.info(action='Import', status='OK', message='[{}] {} : {} records', message_args=(self.spider.name, base_file, len(records)))
+
+    def _import_legacy_file(self):
+        legacy_file = os.path.join(os.path.dirname(self.work_file), 'requests.fingerprints')
+        if not os.path.exists(legacy_file):
+            return
+        rejected = 0
+        with open(legacy_file, 'r') as file:
+            for line in filter(str.strip, file):
+                try:
+                    _fp = bytes.fromhex(line.strip())
+                except ValueError:
+                    _fp = None
+                if _fp is None or len(_fp) != self.fingerprinter.digest_size:
+                    rejected += 1
+                else:
+                    self._import(_fp)
+        self.journal.flush()
+        if rejected:
+            # Keep the rejected records around (e.g. written with another FINGERPRINT_DIGEST_SIZE)
+            os.replace(legacy_file, legacy_file + '.bak')
+            self.crawler.stats.inc_value('scheduler/dupefilter/legacy/rejected', rejected, spider=self.spider)
+            self.logger.warning(action='Import', status='FAIL', message='[{}] {} : {} records rejected, kept in {}', message_args=(self.spider.name, legacy_file, rejected, legacy_file + '.bak'))
+        else:
+            os.remove(legacy_file)
+        self.logger.info(action='Import', status='OK', message='[{}] {}', message_args=(self.spider.name, legacy_file))
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
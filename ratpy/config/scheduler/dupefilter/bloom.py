@@ -0,0 +1,313 @@
+""" Ratpy Dupefilter Bloom module """
+
+import json
+import math
+import os
+import struct
+
+from ratpy.config.scheduler.dupefilter import RatpyDupefilter
+
+# ############################################################### #
+# ############################################################### #
+
+BLOOM_MAGIC = b'RPBF'
+BLOOM_VERSION = 1
+
+# ############################################################### #
+
+
+class ScalableBloomFilter:
+
+    """ Ratpy Scalable Bloom Filter class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    error_rate = None
+    capacity = None
+    memory = None
+    growth = 2
+    tightening = 0.5
+
+    saturated = None
+
+    _slices = None
+
+    # ####################################################### #
+
+    def __init__(self, error_rate=0.001, capacity=1000000, memory=0):
+
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.memory = memory
+
+        self.saturated = False
+        self._slices = []
+
+    # ####################################################### #
+
+    @property
+    def infos(self):
+        return {
+            'error_rate': self.error_rate,
+            'capacity': self.capacity,
+            'memory': self.memory,
+            'used_memory': self.used_memory,
+            'slices': len(self._slices),
+            'saturated': self.saturated,
+            'fill_ratio': self.fill_ratio,
+            'false_positive_rate': self.false_positive_rate
+            }
+
+    def __len__(self):
+        return sum(_slice['count'] for _slice in self._slices)
+
+    @property
+    def used_memory(self):
+        return sum(len(_slice['bits']) for _slice in self._slices)
+
+    @property
+    def fill_ratio(self):
+        bits = sum(_slice['size'] for _slice in self._slices)
+        return sum(_slice['set_bits'] for _slice in self._slices) / bits if bits else 0.0
+
+    @property
+    def false_positive_rate(self):
+        """ Estimated probability that an unseen digest is reported as seen. """
+
+        miss = 1.0
+        for _slice in self._slices:
+            miss *= 1.0 - (_slice['set_bits'] / _slice['size']) ** _slice['hashes']
+        return 1.0 - miss
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def _new_slice(self):
+        index = len(self._slices)
+        capacity = self.capacity * self.growth ** index
+        error_rate = self.error_rate * (1 - self.tightening) * self.tightening ** index
+
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        if self.memory:
+            available = (self.memory - self.used_memory) * 8
+            if available < size and self._slices:
+                return None
+            size = max(min(size, available), 8)
+
+        return {
+            'size': size,
+            'hashes': max(1, math.ceil(-math.log2(error_rate))),
+            'capacity': capacity,
+            'count': 0,
+            'set_bits': 0,
+            'bits': bytearray((size + 7) // 8)
+            }
+
+    @staticmethod
+    def _hashes(digest):
+        half = min(len(digest) // 2, 8)
+        return int.from_bytes(digest[:half], 'little'), int.from_bytes(digest[half:2*half], 'little') | 1
+
+    @staticmethod
+    def _contains(_slice, h1, h2):
+        bits = _slice['bits']
+        size = _slice['size']
+        for i in range(_slice['hashes']):
+            p = (h1 + i * h2) % size
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def __contains__(self, digest):
+        h1, h2 = self._hashes(digest)
+        return any(self._contains(_slice, h1, h2) for _slice in self._slices)
+
+    def add(self, digest):
+        """ Add a digest, return True if it was (probably) already present. """
+
+        h1, h2 = self._hashes(digest)
+        for _slice in self._slices:
+            if self._contains(_slice, h1, h2):
+                return True
+
+        if not self._slices or (self._slices[-1]['count'] >= self._slices[-1]['capacity'] and not self.saturated):
+            _slice = self._new_slice()
+            if _slice is None:
+                self.saturated = True
+            else:
+                self._slices.append(_slice)
+
+        _slice = self._slices[-1]
+        bits = _slice['bits']
+        size = _slice['size']
+        for i in range(_slice['hashes']):
+            p = (h1 + i * h2) % size
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                _slice['set_bits'] += 1
+        _slice['count'] += 1
+        return False
+
+    # ####################################################### #
+
+    def load(self, path):
+        with open(path, 'rb') as file:
+            if file.read(len(BLOOM_MAGIC)) != BLOOM_MAGIC or file.read(1)[0] != BLOOM_VERSION:
+                raise ValueError('Invalid bloom filter file : {}'.format(path))
+            meta = json.loads(file.read(struct.unpack('>I', file.read(4))[0]))
+            self.saturated = meta['saturated']
+            self._slices = []
+            for _slice in meta['slices']:
+                _slice['bits'] = bytearray(file.read((_slice['size'] + 7) // 8))
+                self._slices.append(_slice)
+
+    def save(self, path):
+        meta = json.dumps({
+            'error_rate': self.error_rate,
+            'capacity': self.capacity,
+            'saturated': self.saturated,
+            'slices': [{key: value for key, value in _slice.items() if key != 'bits'} for _slice in self._slices]
+            }).encode()
+        with open(path + '.tmp', 'wb') as file:
+            file.write(BLOOM_MAGIC + bytes([BLOOM_VERSION]) + struct.pack('>I', len(meta)) + meta)
+            for _slice in self._slices:
+                file.write(_slice['bits'])
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + '.tmp', path)
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+
+
+class RatpyBloomDupefilter(RatpyDupefilter):
+
+    """ Ratpy Bloom Dupefilter class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    name = 'ratpy.dupefilter.bloom'
+
+    journal_name = 'bloom.journal'
+
+    bloom_file = None
+    snapshot_size = None
+
+    bloom = None
+
+    # ####################################################### #
+
+    def __init__(self, crawler, directory):
+
+        super().__init__(crawler, directory)
+
+        # h1 / h2 come from the two halves of the digest : shorter halves cluster the bit positions
+        if self.fingerprinter.digest_size < 8:
+            raise ValueError('Bloom dupefilter needs a FINGERPRINT_DIGEST_SIZE of at least 8 bytes : {}'.format(self.fingerprinter.digest_size))
+
+        settings = self.crawler.settings
+        self.bloom_file = os.path.join(os.path.dirname(self.work_file), 'requests.bloom')
+        self.snapshot_size = settings.getint('DUPEFILTER_BLOOM_SNAPSHOT_SIZE', 100000)
+        self.fingerprints = None
+        self.bloom = ScalableBloomFilter(
+            error_rate=settings.getfloat('DUPEFILTER_BLOOM_ERROR_RATE', 0.001),
+            capacity=settings.getint('DUPEFILTER_BLOOM_CAPACITY', 1000000),
+            memory=settings.getint('DUPEFILTER_BLOOM_MEMORY', 0)
+            )
+
+    # ####################################################### #
+
+    def open(self, spider, *args, **kwargs):
+        self.logger.debug(action='Open')
+
+        self.spider = spider
+
+        if self.crawler.settings.get('WORK_ON_DISK', False):
+            if os.path.exists(self.bloom_file):
+                self.bloom.load(self.bloom_file)
+            for digest in self._open_journal():
+                self.bloom.add(digest)
+            self._import_history()
+
+        self.logger.info(action='Open', status='OK', message='[{}] Requests : {}'.format(self.spider.name, len(self)))
+
+    def close(self, reason, *args, **kwargs):
+        self.logger.debug(action='Close')
+
+        if self.crawler.settings.get('WORK_ON_DISK', False):
+            self._snapshot()
+            self.journal.close()
+        self._update_stats()
+
+        self.logger.info(action='Close', status='OK', message='[{}] Requests : {}'.format(self.spider.name, len(self)))
+
+    # ####################################################### #
+
+    def __len__(self):
+        return len(self.bloom)
+
+    @property
+    def infos(self):
+        infos = super().infos
+        infos['bloom_file'] = self.bloom_file
+        infos['snapshot_size'] = self.snapshot_size
+        infos['bloom'] = self.bloom.infos
+        return infos
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def seen(self, request):
+
+        self.crawler.stats.inc_value('scheduler/dupefilter/inputs', spider=self.spider)
+
+        digest = self.fingerprint(request)
+        if self.bloom.add(digest):
+            self.logger.debug(action='Filter', status='OK', message='[{}]', message_args=(request.url,))
+            return True
+
+        if self.journal.opened:
+            self.journal.append(digest)
+            if self.journal.flush_if_needed():
+                self.crawler.stats.inc_value('scheduler/dupefilter/journal/flushes', spider=self.spider)
+            if len(self.journal) >= self.snapshot_size:
+                self._snapshot()
+
+        self.crawler.stats.inc_value('scheduler/dupefilter/outputs', spider=self.spider)
+        return False
+
+    # ####################################################### #
+
+    def _import(self, fingerprint):
+        if not self.bloom.add(fingerprint):
+            self.journal.append(fingerprint)
+            if len(self.journal) >= self.snapshot_size:
+                self._snapshot()
+
+    def _snapshot(self):
+        self.logger.debug(action='Snapshot', message='{}', message_args=(len(self.journal),))
+
+        self.journal.flush()
+        self.bloom.save(self.bloom_file)
+        self.journal.compact([])
+        self._update_stats()
+
+        self.logger.debug(action='Snapshot', status='OK')
+
+    def _update_stats(self):
+        self.crawler.stats.set_value('scheduler/dupefilter/bloom/fill_ratio', self.bloom.fill_ratio, spider=self.spider)
+        self.crawler.stats.set_value('scheduler/dupefilter/bloom/false_positive_rate', self.bloom.false_positive_rate, spider=self.spider)
+        self.crawler.stats.set_value('scheduler/dupefilter/bloom/memory', self.bloom.used_memory, spider=self.spider)
+        if self.bloom.saturated:
+            self.crawler.stats.set_value('scheduler/dupefilter/bloom/saturated', True, spider=self.spider)
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
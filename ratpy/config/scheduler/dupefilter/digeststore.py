@@ -0,0 +1,166 @@
+""" Ratpy Dupefilter Digest Store module """
+
+import os
+
+import numpy
+
+from ratpy.config.scheduler.dupefilter import RatpyDupefilter
+
+# ############################################################### #
+# ############################################################### #
+
+
+class RatpyDigestDupefilter(RatpyDupefilter):
+
+    """ Ratpy Digest Dupefilter class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    name = 'ratpy.dupefilter.digest'
+
+    journal_name = 'digests.journal'
+
+    store_file = None
+    digest_size = None
+    merge_size = None
+
+    _store = None
+    _delta = None
+
+    # ####################################################### #
+
+    def __init__(self, crawler, directory):
+
+        self.digest_size = crawler.settings.getint('DUPEFILTER_DIGEST_SIZE', 8)
+        self.merge_size = crawler.settings.getint('DUPEFILTER_DIGEST_MERGE_SIZE', 100000)
+
+        super().__init__(crawler, directory)
+
+        if not 4 <= self.digest_size <= self.fingerprinter.digest_size:
+            raise ValueError('DUPEFILTER_DIGEST_SIZE must be between 4 and {} bytes : {}'.format(self.fingerprinter.digest_size, self.digest_size))
+
+        self.store_file = os.path.join(os.path.dirname(self.work_file), 'digests.npy')
+        self.fingerprints = None
+        self._delta = set()
+
+    # ####################################################### #
+
+    def open(self, spider, *args, **kwargs):
+        self.logger.debug(action='Open')
+
+        self.spider = spider
+
+        if self.crawler.settings.get('WORK_ON_DISK', False):
+            self._store = self._load_store()
+            self._delta.update(digest for digest in self._open_journal() if not self._in_store(digest))
+            self._import_history()
+        else:
+            self._store = self._empty_store()
+
+        self.logger.info(action='Open', status='OK', message='[{}] Requests : {}'.format(self.spider.name, len(self)))
+
+    def close(self, reason, *args, **kwargs):
+        self.logger.debug(action='Close')
+
+        if self.crawler.settings.get('WORK_ON_DISK', False):
+            self.journal.close()
+
+        self.logger.info(action='Close', status='OK', message='[{}] Requests : {}'.format(self.spider.name, len(self)))
+
+    # ####################################################### #
+
+    def __len__(self):
+        return (len(self._store) if self._store is not None else 0) + len(self._delta)
+
+    @property
+    def infos(self):
+        infos = super().infos
+        infos['store_file'] = self.store_file
+        infos['digest_size'] = self.digest_size
+        infos['merge_size'] = self.merge_size
+        infos['store'] = len(self._store) if self._store is not None else 0
+        infos['delta'] = len(self._delta)
+        return infos
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def seen(self, request):
+
+        self.crawler.stats.inc_value('scheduler/dupefilter/inputs', spider=self.spider)
+
+        digest = self.fingerprint(request)[:self.digest_size]
+        if digest in self._delta or self._in_store(digest):
+            self.logger.debug(action='Filter', status='OK', message='[{}]', message_args=(request.url,))
+            return True
+
+        self._delta.add(digest)
+        if self.journal.opened:
+            self.journal.append(digest)
+            if self.journal.flush_if_needed():
+                self.crawler.stats.inc_value('scheduler/dupefilter/journal/flushes', spider=self.spider)
+        if len(self._delta) >= self.merge_size:
+            self._merge()
+
+        self.crawler.stats.inc_value('scheduler/dupefilter/outputs', spider=self.spider)
+        return False
+
+    # ####################################################### #
+
+    def _record_size(self):
+        return self.digest_size
+
+    def _import(self, fingerprint):
+        digest = fingerprint[:self.digest_size]
+        if digest not in self._delta and not self._in_store(digest):
+            self._delta.add(digest)
+            self.journal.append(digest)
+            if len(self._delta) >= self.merge_size:
+                self._merge()
+
+    def _empty_store(self):
+        return numpy.empty(0, dtype='S{}'.format(self.digest_size))
+
+    def _load_store(self):
+        if not os.path.exists(self.store_file):
+            return self._empty_store()
+        # plain ndarray view on the mapping: memmap indexing goes through python
+        store = numpy.load(self.store_file, mmap_mode='r').view(numpy.ndarray)
+        if store.dtype != numpy.dtype('S{}'.format(self.digest_size)):
+            raise ValueError('Digest store {} holds {} digests, expected S{}'.format(self.store_file, store.dtype, self.digest_size))
+        return store
+
+    def _in_store(self, digest):
+        # numpy fixed-size bytes drop trailing nulls when read back
+        index = self._store.searchsorted(digest)
+        return index < len(self._store) and self._store[index] == digest.rstrip(b'\x00')
+
+    def _merge(self):
+        self.logger.debug(action='Merge', message='{} + {}', message_args=(len(self._store), len(self._delta)))
+
+        delta = numpy.array(sorted(self._delta), dtype='S{}'.format(self.digest_size))
+        merged = numpy.insert(self._store, self._store.searchsorted(delta), delta)
+
+        if self.journal.opened:
+            with open(self.store_file + '.tmp', 'wb') as file:
+                numpy.save(file, merged)
+                file.flush()
+                os.fsync(file.fileno())
+            del merged
+            self._store = None
+            os.replace(self.store_file + '.tmp', self.store_file)
+            self._store = self._load_store()
+            self.journal.compact([])
+        else:
+            self._store = merged
+
+        self._delta = set()
+        self.crawler.stats.inc_value('scheduler/dupefilter/merges', spider=self.spider)
+        self.logger.debug(action='Merge', status='OK', message='{}', message_args=(len(self._store),))
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
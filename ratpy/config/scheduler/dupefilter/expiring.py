@@ -0,0 +1,128 @@
+""" Ratpy Dupefilter Expiring module """
+
+import struct
+import time
+
+from ratpy.config.scheduler.dupefilter import RatpyDupefilter
+
+# ############################################################### #
+# ############################################################### #
+
+
+class RatpyExpiringDupefilter(RatpyDupefilter):
+
+    """ Ratpy Expiring Dupefilter class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    name = 'ratpy.dupefilter.expiring'
+
+    journal_name = 'expiring.journal'
+
+    expiry = None
+    sweep_interval = None
+
+    _record = None
+    _last_sweep = None
+
+    # ####################################################### #
+
+    def __init__(self, crawler, directory):
+
+        super().__init__(crawler, directory)
+
+        settings = self.crawler.settings
+        self.expiry = settings.getint('DUPEFILTER_EXPIRY', 0)
+        self.sweep_interval = settings.getint('DUPEFILTER_EXPIRY_SWEEP_INTERVAL', 3600)
+        self.fingerprints = {}
+
+    # ####################################################### #
+
+    def open(self, spider, *args, **kwargs):
+        self.logger.debug(action='Open')
+
+        self.spider = spider
+        self._last_sweep = time.time()
+
+        if self.crawler.settings.get('WORK_ON_DISK', False):
+            for record in self._open_journal():
+                key, due = self._record.unpack(record)
+                self.fingerprints[key] = due
+            self._sweep()
+            self._compact_if_needed()
+
+        self.logger.info(action='Open', status='OK', message='[{}] Requests : {}'.format(self.spider.name, len(self)))
+
+    # ####################################################### #
+
+    @property
+    def infos(self):
+        infos = super().infos
+        infos['expiry'] = self.expiry
+        infos['sweep_interval'] = self.sweep_interval
+        return infos
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def seen(self, request):
+
+        self.crawler.stats.inc_value('scheduler/dupefilter/inputs', spider=self.spider)
+
+        now = time.time()
+        key = self.fingerprint(request)
+        due = self.fingerprints.get(key)
+
+        if due is not None and self._expired(due, now):
+            del self.fingerprints[key]
+            self.crawler.stats.inc_value('scheduler/dupefilter/expired', spider=self.spider)
+            due = None
+
+        if due is not None:
+            if not request.timestamp or request.timestamp <= due:
+                self.logger.debug(action='Filter', status='OK', message='[{}]', message_args=(request.url,))
+                return True
+            self.crawler.stats.inc_value('scheduler/dupefilter/refreshed', spider=self.spider)
+
+        self.fingerprints[key] = request.timestamp or now
+        self._journalize(self._record.pack(key, self.fingerprints[key]))
+
+        if self.expiry and now - self._last_sweep >= self.sweep_interval:
+            self._sweep()
+
+        self.crawler.stats.inc_value('scheduler/dupefilter/outputs', spider=self.spider)
+        return False
+
+    def fingerprint(self, request):
+        return self.fingerprinter.fingerprint(request, keep_timestamp=False)
+
+    # ####################################################### #
+
+    def _record_size(self):
+        self._record = struct.Struct('<{}sd'.format(self.fingerprinter.digest_size))
+        return self._record.size
+
+    def _expired(self, due, now):
+        return self.expiry and due + self.expiry < now
+
+    def _sweep(self):
+        now = time.time()
+        self._last_sweep = now
+        if not self.expiry:
+            return
+        expired = [key for key, due in self.fingerprints.items() if self._expired(due, now)]
+        for key in expired:
+            del self.fingerprints[key]
+        if expired:
+            self.crawler.stats.inc_value('scheduler/dupefilter/expired', len(expired), spider=self.spider)
+            self.logger.debug(action='Sweep', status='OK', message='{}', message_args=(len(expired),))
+
+    def _records(self):
+        return (self._record.pack(key, due) for key, due in self.fingerprints.items())
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
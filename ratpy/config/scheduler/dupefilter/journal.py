@@ -0,0 +1,162 @@
+""" Ratpy Dupefilter Journal module """
+
+import os
+import time
+
+from twisted.internet import task
+
+# ############################################################### #
+# ############################################################### #
+
+JOURNAL_MAGIC = b'RPFJ'
+JOURNAL_VERSION = 1
+
+# ############################################################### #
+
+
+class FingerprintJournal:
+
+    """ Ratpy Fingerprint Journal class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    path = None
+    record_size = None
+
+    batch_size = None
+    batch_interval = None
+    fsync = None
+
+    discarded = None
+
+    _file = None
+    _pending = None
+    _records = None
+    _last_flush = None
+    _flush_task = None
+
+    # ####################################################### #
+
+    def __init__(self, path, record_size, batch_size=1000, batch_interval=1000, fsync=True):
+
+        self.path = path
+        self.record_size = record_size
+
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval / 1000
+        self.fsync = fsync
+
+    # ####################################################### #
+
+    @property
+    def header(self):
+        return JOURNAL_MAGIC + bytes([JOURNAL_VERSION, self.record_size])
+
+    @property
+    def infos(self):
+        return {
+            'path': self.path,
+            'record_size': self.record_size,
+            'records': len(self),
+            'pending': len(self._pending) if self._pending is not None else 0,
+            'batch_size': self.batch_size,
+            'batch_interval': self.batch_interval,
+            'fsync': self.fsync
+            }
+
+    @property
+    def opened(self):
+        return self._file is not None
+
+    def __len__(self):
+        return self._records or 0
+
+    # ####################################################### #
+
+    def open(self):
+        """ Open the journal and return the records found on disk. """
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        records = []
+        self.discarded = None
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as file:
+                data = file.read()
+            if not data.startswith(self.header):
+                # Another format or record size (e.g. FINGERPRINT_DIGEST_SIZE changed) : keep it aside, start a fresh journal
+                self.discarded = self.path + '.bak'
+                os.replace(self.path, self.discarded)
+                data = self.header
+                self._write(self.path, [])
+            start = len(self.header)
+            end = start + (len(data) - start) // self.record_size * self.record_size
+            records = [data[i:i+self.record_size] for i in range(start, end, self.record_size)]
+            if end != len(data):
+                with open(self.path, 'r+b') as file:
+                    file.truncate(end)
+        else:
+            self._write(self.path, [])
+
+        self._file = open(self.path, 'ab')
+        self._pending = []
+        self._records = len(records)
+        self._last_flush = time.time()
+        if self.batch_size > 1 and self.batch_interval > 0:
+            self._flush_task = task.LoopingCall(self.flush_if_needed)
+            self._flush_task.start(self.batch_interval, now=False)
+        return records
+
+    def close(self):
+        if self._flush_task and self._flush_task.running:
+            self._flush_task.stop()
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def append(self, record):
+        self._pending.append(record)
+        self._records += 1
+
+    def flush(self):
+        if self._pending:
+            self._file.write(b''.join(self._pending))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._pending = []
+        self._last_flush = time.time()
+
+    def flush_if_needed(self):
+        if len(self._pending) >= max(self.batch_size, 1) or time.time() - self._last_flush >= self.batch_interval:
+            self.flush()
+            return True
+        return False
+
+    def compact(self, records):
+        """ Atomically rewrite the journal with only the given records. """
+
+        self.flush()
+        self._file.close()
+        records = list(records)
+        self._write(self.path + '.tmp', records)
+        os.replace(self.path + '.tmp', self.path)
+        self._file = open(self.path, 'ab')
+        self._records = len(records)
+
+    def _write(self, path, records):
+        with open(path, 'wb') as file:
+            file.write(self.header)
+            file.write(b''.join(records))
+            file.flush()
+            os.fsync(file.fileno())
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
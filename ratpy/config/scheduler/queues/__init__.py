@@ -1,11 +1,18 @@
 """ Ratpy Scheduler Queues module """
 
+import bisect
+import collections
 import os
 import pickle
 import time
 
+from scrapy.utils.httpobj import urlparse_cached
+
+from ratpy.config.scheduler.queues.codec import RatpyRequestCodec
+from ratpy.config.scheduler.queues.heapqueue import RatpyHeapQueue
+from ratpy.config.scheduler.queues.hybridqueue import RatpyHybridQueue
 from ratpy.config.scheduler.queues.listqueue import RatpyListQueue
-from ratpy.config.scheduler.queues.sqlqueue import RatpySQLQueue
+from ratpy.config.scheduler.queues.sqlqueue import RatpySQLQueue, RatpySQLPriorityQueue
 from ratpy.utils import create_instance, Logger, monitored
 from ratpy.http.request.serialize import request_to_dict, request_from_dict
 
@@ -60,10 +67,10 @@ def _ratpy_serialization_queue(queue_class, serialize, deserialize):
             infos['serialization'] = True
             return infos
 
-        def push(self, request, timestamp):
+        def push(self, request, timestamp, *args):
             dictionnary = request_to_dict(request, self.spider)
             serialized = serialize(dictionnary)
-            return super(RatpyRequestQueue, self).push(serialized, timestamp)
+            return super(RatpyRequestQueue, self).push(serialized, timestamp, *args)
 
         def pop(self):
             serialized = super(RatpyRequestQueue, self).pop()
@@ -75,6 +82,63 @@ def _ratpy_serialization_queue(queue_class, serialize, deserialize):
 # ############################################################### #
 
 
+def _ratpy_codec_queue(queue_class, codec_class):
+
+    class RatpyRequestQueue(queue_class):
+
+        spider = None
+        codec = None
+
+        def __init__(self, crawler, *args, **kwargs):
+            self.spider = crawler.spider
+            super(RatpyRequestQueue, self).__init__(crawler, *args, **kwargs)
+
+        @classmethod
+        def from_crawler(cls, crawler, *args, **kwargs):
+            return cls(crawler, *args, **kwargs)
+
+        @property
+        def infos(self):
+            infos = super().infos
+            infos['class'] = queue_class.__module__ + '.' + queue_class.__name__
+            infos['serialization'] = True
+            infos['codec'] = self.codec.infos if self.codec is not None else None
+            return infos
+
+        def open(self):
+            super(RatpyRequestQueue, self).open()
+            self.codec = create_instance(codec_class, self.crawler.settings, None)
+            self.codec.load(self._select_dictionary())
+
+        def push(self, request, timestamp, *args):
+            encoded = self.codec.encode(request, self.spider)
+            new = self.codec.flush()
+            if new:
+                self._insert_dictionary(new)
+            self.crawler.stats.inc_value('scheduler/codec/bytes', len(encoded), spider=self.spider)
+            return super(RatpyRequestQueue, self).push(encoded, timestamp, *args)
+
+        def pop(self):
+            encoded = super(RatpyRequestQueue, self).pop()
+            return self.codec.decode(encoded, self.spider) if encoded else None
+
+    return RatpyRequestQueue
+
+# ############################################################### #
+
+
+def _ratpy_hybrid_queue(memory_queue_class, disk_queue_class):
+
+    class RatpyRequestQueue(_ratpy_non_serialization_queue(RatpyHybridQueue)):
+
+        memory_queue_cls = memory_queue_class
+        disk_queue_cls = disk_queue_class
+
+    return RatpyRequestQueue
+
+# ############################################################### #
+
+
 def _pickle_serialize(obj):
     try:
         return pickle.dumps(obj, protocol=4)
@@ -86,7 +150,12 @@ def _pickle_serialize(obj):
 
 
 RatpyMemoryQueue = _ratpy_non_serialization_queue(RatpyListQueue)
+RatpyHeapMemoryQueue = _ratpy_non_serialization_queue(RatpyHeapQueue)
 RatpyDiskQueue = _ratpy_serialization_queue(RatpySQLQueue, _pickle_serialize, pickle.loads)
+RatpyDiskFrontier = _ratpy_serialization_queue(RatpySQLPriorityQueue, _pickle_serialize, pickle.loads)
+RatpyCompactDiskQueue = _ratpy_codec_queue(RatpySQLQueue, RatpyRequestCodec)
+RatpyCompactDiskFrontier = _ratpy_codec_queue(RatpySQLPriorityQueue, RatpyRequestCodec)
+RatpyHybridDiskQueue = _ratpy_hybrid_queue(RatpyHeapMemoryQueue, RatpyDiskQueue)
 
 # ############################################################### #
 # ############################################################### #
@@ -111,6 +180,8 @@ class RatpyPriorityQueue(Logger):
     queues = None
     start_prios = None
 
+    _priorities = None
+
     # ####################################################### #
 
     def __init__(self, crawler, queues_type, queues_cls, directory, start_prios=()):
@@ -124,6 +195,7 @@ class RatpyPriorityQueue(Logger):
         self.queues_cls = queues_cls
         self.queues = {}
         self.start_prios = start_prios
+        self._priorities = []
 
         self.logger.debug(action='Initialisation', status='OK')
 
@@ -137,9 +209,15 @@ class RatpyPriorityQueue(Logger):
     def infos(self):
         infos = super().infos
         infos['size'] = len(self)
+        infos['next_timestamp'] = self.next_timestamp
         infos['queues'] = {priority: queue.infos for priority, queue in self.queues.items()}
         return infos
 
+    @property
+    def next_timestamp(self):
+        timestamps = [self.queues[priority].next_timestamp for priority in self._priorities]
+        return min(filter(lambda t: t is not None, timestamps), default=None)
+
     # ####################################################### #
 
     def open(self):
@@ -148,6 +226,8 @@ class RatpyPriorityQueue(Logger):
         for priority in self.start_prios:
             self.queues[priority] = self.qfactory(priority)
             self.queues[priority].open()
+            if len(self.queues[priority]):
+                bisect.insort(self._priorities, priority)
 
         self.logger.info(action='Open', status='OK')
 
@@ -184,26 +264,265 @@ class RatpyPriorityQueue(Logger):
 
         success = self.queues[priority].push(request, timestamp)
         if success:
+            if len(self.queues[priority]) == 1:
+                bisect.insort(self._priorities, priority)
             self.crawler.stats.inc_value('scheduler/queue/{}/remaining/[all]'.format(self.queues_type), spider=self.spider)
             self.crawler.stats.inc_value('scheduler/queue/{}/remaining/[{: >3}]'.format(self.queues_type, priority), spider=self.spider)
-            self.logger.debug(action='Push', status='OK', message='{} [{}]'.format(request.url, timestamp))
+            self.logger.debug(action='Push', status='OK', message='{} [{}]', message_args=(request.url, timestamp))
         else:
-            self.logger.debug(action='Push', status='NO', message='{} [{}]'.format(request.url, timestamp))
+            self.logger.debug(action='Push', status='NO', message='{} [{}]', message_args=(request.url, timestamp))
         return success
 
     def pop(self):
         request = None
+        now = time.time()
 
-        for priority in sorted(self.queues):
-            if len(self.queues[priority]):
+        for priority in self._priorities:
+            next_timestamp = self.queues[priority].next_timestamp
+            if next_timestamp is not None and next_timestamp <= now:
                 request = self.queues[priority].pop()
                 if request is not None:
+                    if not len(self.queues[priority]):
+                        self._priorities.remove(priority)
                     self.crawler.stats.dec_value('scheduler/queue/{}/remaining/[all]'.format(self.queues_type), spider=self.spider)
                     self.crawler.stats.dec_value('scheduler/queue/{}/remaining/[{: >3}]'.format(self.queues_type, priority), spider=self.spider)
                     break
 
         if request is not None:
-            self.logger.debug(action='Pop', status='OK', message='{}'.format(request.url))
+            self.logger.debug(action='Pop', status='OK', message='{}', message_args=(request.url,))
+        else:
+            self.logger.debug(action='Pop', status='NO')
+        return request
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
+
+
+class RatpyFrontierQueue(RatpyPriorityQueue):
+
+    """ Ratpy Frontier Queue class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    name = 'ratpy.queue.frontier'
+
+    queue = None
+
+    # ####################################################### #
+
+    def __init__(self, crawler, queues_type, queues_cls, directory, start_prios=()):
+        if not issubclass(queues_cls, RatpySQLPriorityQueue):
+            raise ValueError('{} requires a queue class based on RatpySQLPriorityQueue, got {}'.format(self.__class__.__name__, queues_cls.__name__))
+        RatpyPriorityQueue.__init__(self, crawler, queues_type, queues_cls, directory, start_prios)
+
+    # ####################################################### #
+
+    @property
+    def infos(self):
+        infos = super().infos
+        infos['queues'] = {'all': self.queue.infos} if self.queue is not None else {}
+        return infos
+
+    @property
+    def next_timestamp(self):
+        return self.queue.next_timestamp if self.queue is not None else None
+
+    # ####################################################### #
+
+    def open(self):
+        self.logger.debug(action='Open')
+
+        self.queue = self.qfactory('all')
+        self.queue.open()
+
+        self.logger.info(action='Open', status='OK')
+
+    def close(self):
+        self.logger.debug(action='Close')
+
+        active = self.queue.priorities
+        self.queue.close()
+
+        self.logger.info(action='Close', status='OK')
+
+        return active
+
+    # ####################################################### #
+
+    def __len__(self):
+        return len(self.queue) if self.queue is not None else 0
+
+    # ####################################################### #
+
+    def push(self, request):
+        priority = -request.priority
+        timestamp = request.timestamp or time.time()
+
+        success = self.queue.push(request, timestamp, priority)
+        if success:
+            self.crawler.stats.inc_value('scheduler/queue/{}/remaining/[all]'.format(self.queues_type), spider=self.spider)
+            self.crawler.stats.inc_value('scheduler/queue/{}/remaining/[{: >3}]'.format(self.queues_type, priority), spider=self.spider)
+            self.logger.debug(action='Push', status='OK', message='{} [{}]', message_args=(request.url, timestamp))
+        else:
+            self.logger.debug(action='Push', status='NO', message='{} [{}]', message_args=(request.url, timestamp))
+        return success
+
+    def pop(self):
+        request = self.queue.pop()
+
+        if request is not None:
+            priority = -request.priority
+            self.crawler.stats.dec_value('scheduler/queue/{}/remaining/[all]'.format(self.queues_type), spider=self.spider)
+            self.crawler.stats.dec_value('scheduler/queue/{}/remaining/[{: >3}]'.format(self.queues_type, priority), spider=self.spider)
+            self.logger.debug(action='Pop', status='OK', message='{}', message_args=(request.url,))
+        else:
+            self.logger.debug(action='Pop', status='NO')
+        return request
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
+
+
+@monitored
+class RatpyDomainQueue(Logger):
+
+    """ Ratpy Domain Queue class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    name = 'ratpy.queue.domain'
+
+    directory = None
+    crawler = None
+    spider = None
+
+    queues_type = None
+    queues_cls = None
+    queues = None
+    start_prios = None
+
+    _domains = None
+
+    # ####################################################### #
+
+    def __init__(self, crawler, queues_type, queues_cls, directory, start_prios=()):
+        self.name = self.name + '.' + queues_type
+        self.directory = os.path.join(directory, self.name)
+        self.crawler = crawler
+        self.spider = crawler.spider
+        Logger.__init__(self, self.crawler, directory=self.directory)
+
+        self.queues_type = queues_type
+        self.queues_cls = queues_cls
+        self.queues = {}
+        self.start_prios = start_prios if isinstance(start_prios, dict) else {}
+        self._domains = collections.deque()
+
+        if start_prios and not isinstance(start_prios, dict):
+            self.logger.warning(action='Initialisation', status='SKIP', message='Queue state is not partitioned by domain : {}'.format(start_prios))
+
+        self.logger.debug(action='Initialisation', status='OK')
+
+    @classmethod
+    def from_crawler(cls, crawler, type, queues_cls, dir, start_prios=()):
+        return cls(crawler, type, queues_cls, dir, start_prios)
+
+    # ####################################################### #
+
+    @property
+    def infos(self):
+        infos = super().infos
+        infos['size'] = len(self)
+        infos['next_timestamp'] = self.next_timestamp
+        infos['domains'] = {domain: queue.infos for domain, queue in self.queues.items()}
+        return infos
+
+    @property
+    def next_timestamp(self):
+        timestamps = [self.queues[domain].next_timestamp for domain in self._domains]
+        return min(filter(lambda t: t is not None, timestamps), default=None)
+
+    # ####################################################### #
+
+    def open(self):
+        self.logger.debug(action='Open')
+
+        for domain, priorities in self.start_prios.items():
+            self.queues[domain] = self.qfactory(domain, priorities)
+            self.queues[domain].open()
+            if len(self.queues[domain]):
+                self._domains.append(domain)
+
+        self.logger.info(action='Open', status='OK', message='Domains : {}'.format(len(self._domains)))
+
+    def close(self):
+        self.logger.debug(action='Close')
+
+        active = {}
+
+        for domain in sorted(self.queues):
+            active[domain] = self.queues[domain].close()
+
+        self.logger.info(action='Close', status='OK')
+
+        return active
+
+    # ####################################################### #
+
+    def __len__(self):
+        return sum(len(x) for x in self.queues.values()) if self.queues else 0
+
+    # ####################################################### #
+
+    def qfactory(self, domain, start_prios=()):
+        return RatpyPriorityQueue(self.crawler, self.queues_type, self.queues_cls, os.path.join(self.directory, domain), start_prios)
+
+    @staticmethod
+    def domain(request):
+        return request.meta.get('download_slot') or urlparse_cached(request).hostname or ''
+
+    def _has_free_slot(self, domain):
+        downloader = getattr(getattr(self.crawler, 'engine', None), 'downloader', None)
+        slot = downloader.slots.get(domain) if downloader is not None else None
+        return slot is None or len(slot.active) < slot.concurrency
+
+    # ####################################################### #
+
+    def push(self, request):
+        domain = self.domain(request)
+        if domain not in self.queues:
+            self.queues[domain] = self.qfactory(domain)
+            self.queues[domain].open()
+
+        success = self.queues[domain].push(request)
+        if success and len(self.queues[domain]) == 1:
+            self._domains.append(domain)
+        return success
+
+    def pop(self):
+        request = None
+
+        for _ in range(len(self._domains)):
+            domain = self._domains[0]
+            self._domains.rotate(-1)
+            if not self._has_free_slot(domain):
+                continue
+            request = self.queues[domain].pop()
+            if request is not None:
+                if not len(self.queues[domain]):
+                    self._domains.remove(domain)
+                break
+
+        if request is not None:
+            self.logger.debug(action='Pop', status='OK', message='{}', message_args=(request.url,))
         else:
             self.logger.debug(action='Pop', status='NO')
         return request
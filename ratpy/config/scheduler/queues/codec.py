@@ -0,0 +1,255 @@
+""" Ratpy Scheduler Queues Codec module """
+
+import marshal
+import pickle
+import zlib
+
+from ratpy.utils import load_object
+from ratpy.http.request import Request
+from ratpy.http.request.serialize import _find_method, _get_method
+from ratpy.spider.router import ROUTE_META_KEY
+
+# ############################################################### #
+# ############################################################### #
+
+CODEC_VERSION = 2
+
+# records written with the flags layout of version 1 are still decoded
+_FLAGS_VERSION = 1
+
+_CALLBACK = 1 << 0
+_ERRBACK = 1 << 1
+_METHOD = 1 << 2
+_HEADERS = 1 << 3
+_BODY = 1 << 4
+_COMPRESSED = 1 << 5
+_ENCODING = 1 << 6
+_PRIORITY = 1 << 7
+_TIMESTAMP = 1 << 8
+_DONT_FILTER = 1 << 9
+_EXTRAS = 1 << 10
+_CLASS = 1 << 11
+_INLINE_HEADERS = 1 << 12
+
+_HEADER = bytes([CODEC_VERSION])
+
+# header sets as marshalled dicts : cheaper to build and hash than nested tuples
+_MARSHAL_VERSION = 4
+
+_SEEN_HEADERS_SIZE = 10000
+
+# ############################################################### #
+# ############################################################### #
+
+
+class RatpyRequestCodec:
+
+    """ Ratpy Request Codec class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    compress_min_size = None
+    compress_level = None
+
+    _values = None
+    _ids = None
+    _new = None
+    _seen_headers = None
+
+    # ####################################################### #
+
+    def __init__(self, compress_min_size=1024, compress_level=6):
+
+        self.compress_min_size = compress_min_size
+        self.compress_level = compress_level
+
+        self._values = {}
+        self._ids = {}
+        self._new = []
+        self._seen_headers = set()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.getint('SCHEDULER_CODEC_COMPRESS_MIN_SIZE', 1024), settings.getint('SCHEDULER_CODEC_COMPRESS_LEVEL', 6))
+
+    # ####################################################### #
+
+    @property
+    def infos(self):
+        return {
+            'version': CODEC_VERSION,
+            'dictionary': len(self._values),
+            'compress_min_size': self.compress_min_size,
+            'compress_level': self.compress_level
+            }
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def load(self, rows):
+        for _id, blob in rows:
+            value = pickle.loads(blob)
+            self._values[_id] = value
+            self._ids[value] = _id
+
+    def flush(self):
+        new, self._new = self._new, []
+        return new
+
+    def _intern(self, value):
+        _id = self._ids.get(value)
+        if _id is None:
+            _id = len(self._ids) + 1
+            self._ids[value] = _id
+            self._values[_id] = value
+            self._new.append((_id, pickle.dumps(value, protocol=4)))
+        return _id
+
+    def _intern_headers(self, headers):
+        # Header sets go to the dictionary table once they repeat : a set seen once (e.g. with a Referer) stays inline
+        _id = self._ids.get(headers)
+        if _id is not None:
+            return _id
+        if headers in self._seen_headers:
+            self._seen_headers.discard(headers)
+            return self._intern(headers)
+        if len(self._seen_headers) >= _SEEN_HEADERS_SIZE:
+            self._seen_headers.clear()
+        self._seen_headers.add(headers)
+        return None
+
+    # ####################################################### #
+
+    def encode(self, request, spider=None):
+        # one positional record, unset fields as None : no per-field flag branching and a single pickle call
+        intern = self._intern
+
+        callback = request.callback
+        errback = request.errback
+        headers = request.headers
+        if headers:
+            headers = marshal.dumps(dict(headers), _MARSHAL_VERSION)
+            _id = self._intern_headers(headers)
+            if _id is not None:
+                headers = _id
+        else:
+            headers = None
+        body = request.body or None
+        compressed = None
+        if body and self.compress_min_size and len(body) >= self.compress_min_size:
+            data = zlib.compress(body, self.compress_level)
+            if len(data) < len(body):
+                body, compressed = data, True
+        meta = request.meta
+        route = None
+        if ROUTE_META_KEY in meta:
+            # the url remaining is inline, the subspider names of the route key go to the dictionary
+            remaining, key = meta[ROUTE_META_KEY]
+            route = (remaining, intern(key))
+            meta = meta.copy()
+            del meta[ROUTE_META_KEY]
+
+        record = (
+            request.url,
+            intern(_find_method(spider, callback) if callable(callback) else callback) if callback else None,
+            intern(_find_method(spider, errback) if callable(errback) else errback) if errback else None,
+            None if request.method == 'GET' else intern(request.method),
+            headers,
+            body,
+            compressed,
+            None if request.encoding == 'utf-8' else intern(request.encoding),
+            request.priority or None,
+            request.timestamp,
+            request.dont_filter or None,
+            route,
+            meta or None,
+            request.cookies or None,
+            request.flags or None,
+            request.cb_kwargs or None,
+            None if type(request) is Request else intern(request.__module__ + '.' + request.__class__.__name__)
+            )
+        try:
+            return _HEADER + pickle.dumps(record, protocol=4)
+        except (pickle.PicklingError, AttributeError, TypeError) as _e:
+            raise ValueError(str(_e)) from _e
+
+    def decode(self, data, spider=None):
+        if data[0] == _FLAGS_VERSION:
+            return self._decode_flags(data, spider)
+        if data[0] != CODEC_VERSION:
+            raise ValueError('Unsupported request codec version : {}'.format(data[0]))
+
+        (url, callback, errback, method, headers, body, compressed, encoding, priority, timestamp,
+         dont_filter, route, meta, cookies, flags, cb_kwargs, request_cls) = pickle.loads(data[1:])
+
+        values = self._values
+        kwargs = {'url': url}
+        if callback is not None:
+            kwargs['callback'] = _get_method(spider, values[callback]) if spider else values[callback]
+        if errback is not None:
+            kwargs['errback'] = _get_method(spider, values[errback]) if spider else values[errback]
+        if method is not None:
+            kwargs['method'] = values[method]
+        if headers is not None:
+            kwargs['headers'] = marshal.loads(values[headers] if isinstance(headers, int) else headers)
+        if body is not None:
+            kwargs['body'] = zlib.decompress(body) if compressed else body
+        if encoding is not None:
+            kwargs['encoding'] = values[encoding]
+        if priority is not None:
+            kwargs['priority'] = priority
+        if timestamp is not None:
+            kwargs['timestamp'] = timestamp
+        if dont_filter:
+            kwargs['dont_filter'] = True
+        if route is not None:
+            meta = dict(meta or {}, **{ROUTE_META_KEY: (route[0], values[route[1]])})
+        if meta:
+            kwargs['meta'] = meta
+        if cookies:
+            kwargs['cookies'] = cookies
+        if flags:
+            kwargs['flags'] = flags
+        if cb_kwargs:
+            kwargs['cb_kwargs'] = cb_kwargs
+
+        return (load_object(values[request_cls]) if request_cls is not None else Request)(**kwargs)
+
+    def _decode_flags(self, data, spider=None):
+        record = pickle.loads(data[1:])
+        flags = record[-1]
+        fields = iter(record)
+
+        kwargs = {'url': next(fields)}
+        if flags & _CALLBACK:
+            kwargs['callback'] = _get_method(spider, self._values[next(fields)]) if spider else self._values[next(fields)]
+        if flags & _ERRBACK:
+            kwargs['errback'] = _get_method(spider, self._values[next(fields)]) if spider else self._values[next(fields)]
+        if flags & _METHOD:
+            kwargs['method'] = self._values[next(fields)]
+        if flags & _HEADERS:
+            kwargs['headers'] = {k: list(v) for k, v in self._values[next(fields)]}
+        elif flags & _INLINE_HEADERS:
+            kwargs['headers'] = {k: list(v) for k, v in next(fields)}
+        if flags & _BODY:
+            kwargs['body'] = zlib.decompress(next(fields)) if flags & _COMPRESSED else next(fields)
+        if flags & _ENCODING:
+            kwargs['encoding'] = self._values[next(fields)]
+        if flags & _PRIORITY:
+            kwargs['priority'] = next(fields)
+        if flags & _TIMESTAMP:
+            kwargs['timestamp'] = next(fields)
+        if flags & _DONT_FILTER:
+            kwargs['dont_filter'] = True
+        if flags & _EXTRAS:
+            kwargs.update(next(fields))
+
+        request_cls = load_object(self._values[next(fields)]) if flags & _CLASS else Request
+        return request_cls(**kwargs)
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
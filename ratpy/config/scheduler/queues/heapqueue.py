@@ -0,0 +1,104 @@
+""" Ratpy Scheduler Queues module """
+
+import heapq
+import itertools
+import os
+import time
+
+from ratpy.utils import Logger, monitored
+
+# ############################################################### #
+# ############################################################### #
+
+
+@monitored
+class RatpyHeapQueue(Logger):
+
+    """ Ratpy Heap Queue class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    name = 'ratpy.queue.heap'
+
+    priority = None
+    directory = None
+    crawler = None
+
+    _heap = None
+    _sequence = None
+
+    # ####################################################### #
+
+    def __init__(self, crawler, directory, priority, *args, **kwargs):
+
+        self.priority = str(priority)
+        self.directory = os.path.join(directory, '['+self.priority+']')
+        self.crawler = crawler
+        Logger.__init__(self, self.crawler, directory=self.directory)
+
+        self.logger.debug(action='Initialisation', status='OK', message='[{}]', message_args=(self.priority,))
+
+    # ####################################################### #
+
+    @property
+    def infos(self):
+        infos = super().infos
+        infos['size'] = len(self)
+        return infos
+
+    # ####################################################### #
+
+    def open(self):
+        self.logger.debug(action='Open', message='[{}]', message_args=(self.priority,))
+
+        self._heap = []
+        self._sequence = itertools.count()
+
+        self.logger.debug(action='Open', status='OK', message='[{}]', message_args=(self.priority,))
+
+    def close(self):
+        self.logger.debug(action='Close', message='[{}]', message_args=(self.priority,))
+
+        self._heap.clear()
+
+        self.logger.debug(action='Close', status='OK', message='[{}]', message_args=(self.priority,))
+
+    # ####################################################### #
+
+    def empty(self):
+        return not self._heap
+
+    def __len__(self):
+        return len(self._heap) if self._heap is not None else 0
+
+    @property
+    def next_timestamp(self):
+        return self._heap[0][0] if self._heap else None
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def push(self, request, timestamp):
+        heapq.heappush(self._heap, (timestamp, next(self._sequence), request))
+        self.logger.debug(action='Push', status='OK', message='[{}]', message_args=(self.priority,))
+        return True
+
+    def popitem(self):
+        timestamp, _, request = heapq.heappop(self._heap)
+        return timestamp, request
+
+    def pop(self):
+        if self._heap and self._heap[0][0] <= time.time():
+            request = heapq.heappop(self._heap)[2]
+            self.logger.debug(action='Pop', status='OK', message='[{}]', message_args=(self.priority,))
+        else:
+            request = None
+            self.logger.debug(action='Pop', status='NO', message='[{}]', message_args=(self.priority,))
+        return request
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
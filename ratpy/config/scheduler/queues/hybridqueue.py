@@ -0,0 +1,194 @@
+""" Ratpy Scheduler Queues module """
+
+import os
+import time
+
+from ratpy.utils import Logger, monitored, create_instance
+
+# ############################################################### #
+# ############################################################### #
+
+REQUEST_OVERHEAD = 1024
+
+# ############################################################### #
+
+
+def _request_size(request):
+    return REQUEST_OVERHEAD + len(request.url) + len(request.body or b'')
+
+# ############################################################### #
+
+
+@monitored
+class RatpyHybridQueue(Logger):
+
+    """ Ratpy Hybrid Queue class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    name = 'ratpy.queue.hybrid'
+
+    priority = None
+    directory = None
+    crawler = None
+    spider = None
+
+    memory_queue_cls = None
+    disk_queue_cls = None
+
+    memory_size = None
+    memory_bytes = None
+    refill_size = None
+
+    _memory = None
+    _memory_used = None
+    _disk = None
+
+    # ####################################################### #
+
+    def __init__(self, crawler, directory, priority, *args, memory_size=None, memory_bytes=None, refill_size=None, **kwargs):
+
+        self.priority = str(priority)
+        self.directory = os.path.join(directory, '['+self.priority+']')
+        self.crawler = crawler
+        Logger.__init__(self, self.crawler, directory=self.directory)
+
+        settings = self.crawler.settings
+        self.memory_size = memory_size if memory_size is not None else settings.getint('SCHEDULER_HYBRID_QUEUE_MEMORY_SIZE', 10000)
+        self.memory_bytes = memory_bytes if memory_bytes is not None else settings.getint('SCHEDULER_HYBRID_QUEUE_MEMORY_BYTES', 0)
+        self.refill_size = refill_size if refill_size is not None else settings.getint('SCHEDULER_HYBRID_QUEUE_REFILL_SIZE', 1000)
+
+        self._memory = create_instance(self.memory_queue_cls, None, self.crawler, directory, priority)
+        self._disk = create_instance(self.disk_queue_cls, None, self.crawler, directory, priority, batch_size=self.refill_size, prefetch=self.refill_size)
+
+        self.logger.debug(action='Initialisation', status='OK', message='[{}]', message_args=(self.priority,))
+
+    # ####################################################### #
+
+    @property
+    def infos(self):
+        infos = super().infos
+        infos['size'] = len(self)
+        infos['memory_size'] = self.memory_size
+        infos['memory_bytes'] = self.memory_bytes
+        infos['refill_size'] = self.refill_size
+        infos['memory'] = self._memory.infos
+        infos['disk'] = self._disk.infos
+        return infos
+
+    @property
+    def next_timestamp(self):
+        timestamps = [self._memory.next_timestamp, self._disk.next_timestamp]
+        return min(filter(lambda t: t is not None, timestamps), default=None)
+
+    # ####################################################### #
+
+    def open(self):
+        self.logger.debug(action='Open', message='[{}]', message_args=(self.priority,))
+
+        self._memory.open()
+        self._memory_used = 0
+        self._disk.open()
+
+        self.logger.debug(action='Open', status='OK', message='[{}]', message_args=(self.priority,))
+
+    def close(self):
+        self.logger.debug(action='Close', message='[{}]', message_args=(self.priority,))
+
+        spilled = self._spill()
+        self._memory.close()
+        self._disk.close()
+
+        self.logger.debug(action='Close', status='OK', message='[{}] Spilled : {}', message_args=(self.priority, spilled))
+
+    # ####################################################### #
+
+    def empty(self):
+        return self._memory.empty() and self._disk.empty()
+
+    def __len__(self):
+        return len(self._memory) + len(self._disk)
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def _has_room(self, request=None):
+        if len(self._memory) >= self.memory_size:
+            return False
+        if self.memory_bytes and self._memory_used + (_request_size(request) if request is not None else 0) > self.memory_bytes:
+            return False
+        return True
+
+    def _memory_push(self, request, timestamp):
+        self._memory_used += _request_size(request)
+        return self._memory.push(request, timestamp)
+
+    def _memory_pop(self):
+        request = self._memory.pop()
+        if request is not None:
+            self._memory_used -= _request_size(request)
+        return request
+
+    def _disk_first(self):
+        disk_timestamp = self._disk.next_timestamp
+        if disk_timestamp is None:
+            return False
+        memory_timestamp = self._memory.next_timestamp
+        return memory_timestamp is None or disk_timestamp < memory_timestamp
+
+    def _refill(self):
+        count = 0
+        while count < self.refill_size and self._has_room():
+            request = self._disk.pop()
+            if request is None:
+                break
+            self._memory_push(request, request.timestamp or 0)
+            count += 1
+        if count:
+            self.crawler.stats.inc_value('scheduler/queue/hybrid/refilled', count, spider=self.spider)
+            self.logger.debug(action='Refill', status='OK', message='[{}] {}', message_args=(self.priority, count))
+        return count
+
+    def _spill(self):
+        count = 0
+        while len(self._memory):
+            timestamp, request = self._memory.popitem()
+            try:
+                self._disk.push(request, timestamp)
+            except ValueError:
+                self.crawler.stats.inc_value('scheduler/unserializable', spider=self.spider)
+                self.logger.error(action='Spill', status='FAIL', message='[{}] {}'.format(self.priority, request.url))
+                continue
+            count += 1
+        self._memory_used = 0
+        return count
+
+    # ####################################################### #
+
+    def push(self, request, timestamp):
+        if self._has_room(request):
+            success = self._memory_push(request, timestamp)
+        else:
+            success = self._disk.push(request, timestamp)
+            self.crawler.stats.inc_value('scheduler/queue/hybrid/spilled', spider=self.spider)
+        self.logger.debug(action='Push', status='OK' if success else 'NO', message='[{}]', message_args=(self.priority,))
+        return success
+
+    def pop(self):
+        request = None
+        if self._disk_first() and self._disk.next_timestamp < time.time():
+            if not self._refill():
+                request = self._disk.pop()
+        if request is None:
+            request = self._memory_pop()
+        if request is None:
+            request = self._disk.pop()
+        self.logger.debug(action='Pop', status='OK' if request is not None else 'NO', message='[{}]', message_args=(self.priority,))
+        return request
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
@@ -35,7 +35,7 @@ class RatpyListQueue(Logger):
         self.crawler = crawler
         Logger.__init__(self, self.crawler, directory=self.directory)
 
-        self.logger.debug(action='Initialisation', status='OK', message='[{}]'.format(self.priority))
+        self.logger.debug(action='Initialisation', status='OK', message='[{}]', message_args=(self.priority,))
 
     # ####################################################### #
 
@@ -48,21 +48,21 @@ class RatpyListQueue(Logger):
     # ####################################################### #
 
     def open(self):
-        self.logger.debug(action='Open', message='[{}]'.format(self.priority))
+        self.logger.debug(action='Open', message='[{}]', message_args=(self.priority,))
 
         self._list = []
         self._total = 0
 
-        self.logger.debug(action='Open', status='OK', message='[{}]'.format(self.priority))
+        self.logger.debug(action='Open', status='OK', message='[{}]', message_args=(self.priority,))
 
     def close(self):
-        self.logger.debug(action='Close', message='[{}]'.format(self.priority))
+        self.logger.debug(action='Close', message='[{}]', message_args=(self.priority,))
 
         for _ in self._list:
             del self._list[0]
             self._total -= 1
 
-        self.logger.debug(action='Close', status='OK', message='[{}]'.format(self.priority))
+        self.logger.debug(action='Close', status='OK', message='[{}]', message_args=(self.priority,))
 
     # ####################################################### #
 
@@ -72,6 +72,10 @@ class RatpyListQueue(Logger):
     def __len__(self):
         return self._total
 
+    @property
+    def next_timestamp(self):
+        return self._list[0][1] if self._total else None
+
     # ####################################################### #
     # ####################################################### #
 
@@ -80,17 +84,17 @@ class RatpyListQueue(Logger):
         self._list.append(x)
         self._list.sort(key=lambda elem: elem[1])
         self._total += 1
-        self.logger.debug(action='Push', status='OK', message='[{}]'.format(self.priority))
+        self.logger.debug(action='Push', status='OK', message='[{}]', message_args=(self.priority,))
         return True
 
     def pop(self):
         if self._total and self._list[0][1] <= time.time():
             self._total -= 1
             request = self._list.pop(0)[0]
-            self.logger.debug(action='Pop', status='OK', message='[{}]'.format(self.priority))
+            self.logger.debug(action='Pop', status='OK', message='[{}]', message_args=(self.priority,))
         else:
             request = None
-            self.logger.debug(action='Pop', status='NO', message='[{}]'.format(self.priority))
+            self.logger.debug(action='Pop', status='NO', message='[{}]', message_args=(self.priority,))
         return request
 
     # ####################################################### #
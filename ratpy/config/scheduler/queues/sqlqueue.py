@@ -1,10 +1,13 @@
 """ Ratpy Scheduler Queues module """
 
+import collections
 import os
 import sqlite3
 import threading
 import time
 
+from twisted.internet import task
+
 from ratpy.utils import Logger, monitored
 from ratpy.utils.path import create_directory, work_directory
 
@@ -36,26 +39,47 @@ class RatpySQLQueue(Logger):
     timeout = None
     multithreading = None
 
+    batch_size = None
+    batch_interval = None
+    prefetch = None
+    synchronous = None
+
     _conn = None
     _getter = None
     _putter = None
 
     _total = None
 
+    _pending_inserts = None
+    _pending_deletes = None
+    _prefetched = None
+    _last_flush = None
+    _flush_task = None
+
+    _next_timestamp = None
+
     transaction_lock = None
     put_event = None
 
     _TABLE_NAME = 'queue'
+    _SCHEMA_VERSION = 1
     _SQL_CREATE = 'CREATE TABLE IF NOT EXISTS {table_name} (_id INTEGER PRIMARY KEY AUTOINCREMENT, data BLOB, timestamp FLOAT)'
+    _SQL_CREATE_INDEX = 'CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} (timestamp, _id)'
     _SQL_INSERT = 'INSERT INTO {table_name} (data, timestamp) VALUES (?, ?)'
-    _SQL_SELECT = 'SELECT _id, data FROM {table_name} WHERE timestamp < ? ORDER BY timestamp ASC LIMIT 1'
+    _SQL_SELECT = 'SELECT _id, data, timestamp, (SELECT timestamp FROM {table_name} WHERE _id != head._id ORDER BY timestamp ASC LIMIT 1) FROM {table_name} AS head WHERE timestamp < ? ORDER BY timestamp ASC, _id ASC LIMIT 1'
+    _SQL_SELECT_MANY = 'SELECT _id, data, timestamp FROM {table_name} WHERE timestamp < ? ORDER BY timestamp ASC, _id ASC LIMIT ?'
     _SQL_DELETE = 'DELETE FROM {table_name} WHERE _id = ?'
     _SQL_COUNT = 'SELECT COUNT(_id) FROM {table_name}'
     _SQL_SELECT_OLDER_TIMESTAMP = 'SELECT timestamp FROM {table_name} ORDER BY timestamp ASC LIMIT 1'
 
+    _DICTIONARY_TABLE_NAME = 'dictionary'
+    _SQL_CREATE_DICTIONARY = 'CREATE TABLE IF NOT EXISTS {table_name} (_id INTEGER PRIMARY KEY, value BLOB)'
+    _SQL_INSERT_DICTIONARY = 'INSERT INTO {table_name} (_id, value) VALUES (?, ?)'
+    _SQL_SELECT_DICTIONARY = 'SELECT _id, value FROM {table_name} ORDER BY _id ASC'
+
     # ####################################################### #
 
-    def __init__(self, crawler, directory, priority, *args, multithreading=True, timeout=10.0, **kwargs):
+    def __init__(self, crawler, directory, priority, *args, multithreading=True, timeout=10.0, batch_size=None, batch_interval=None, prefetch=None, synchronous=None, **kwargs):
 
         self.priority = str(priority)
         self.directory = os.path.join(directory, '['+self.priority+']')
@@ -65,7 +89,13 @@ class RatpySQLQueue(Logger):
         self.multithreading = multithreading
         self.timeout = timeout
 
-        self.logger.debug(action='Initialisation', status='OK', message='[{}]'.format(self.priority))
+        settings = self.crawler.settings
+        self.batch_size = batch_size if batch_size is not None else settings.getint('SCHEDULER_DISK_QUEUE_BATCH_SIZE', 0)
+        self.batch_interval = (batch_interval if batch_interval is not None else settings.getint('SCHEDULER_DISK_QUEUE_BATCH_INTERVAL', 1000)) / 1000
+        self.prefetch = prefetch if prefetch is not None else settings.getint('SCHEDULER_DISK_QUEUE_PREFETCH', 0)
+        self.synchronous = synchronous if synchronous is not None else settings.get('SCHEDULER_DISK_QUEUE_SYNCHRONOUS', 'FULL')
+
+        self.logger.debug(action='Initialisation', status='OK', message='[{}]', message_args=(self.priority,))
 
     # ####################################################### #
 
@@ -74,8 +104,27 @@ class RatpySQLQueue(Logger):
         infos = super().infos
         infos['work_file'] = self.work_file
         infos['size'] = len(self)
+        infos['batch_size'] = self.batch_size
+        infos['batch_interval'] = self.batch_interval
+        infos['prefetch'] = self.prefetch
+        infos['synchronous'] = self.synchronous
+        infos['next_timestamp'] = self.next_timestamp
         return infos
 
+    @property
+    def next_timestamp(self):
+        if not self._total:
+            return None
+        if self._prefetched:
+            return self._prefetched[0][2]
+        if self._next_timestamp is None:
+            if self._pending_deletes:
+                self._flush()
+            timestamps = [row[1] for row in self._pending_inserts]
+            timestamps.append(self._select_older_timestamp())
+            self._next_timestamp = min(filter(lambda t: t is not None, timestamps), default=None)
+        return self._next_timestamp
+
     # ####################################################### #
 
     def open(self):
@@ -89,13 +138,16 @@ class RatpySQLQueue(Logger):
                 self.work_file = os.path.join(work_dir, self.name+'.db')
                 conn = sqlite3.connect(self.work_file, timeout=timeout, check_same_thread=not multithreading)
             conn.execute('PRAGMA journal_mode=WAL;')
+            conn.execute('PRAGMA synchronous={};'.format(self.synchronous))
             return conn
 
-        self.logger.debug(action='Open', message='[{}]'.format(self.priority))
+        self.logger.debug(action='Open', message='[{}]', message_args=(self.priority,))
 
         self._conn = open_connection(self.multithreading, self.timeout)
         self._conn.execute(self._sql_create())
+        self._conn.execute(self._sql_create_dictionary())
         self._conn.commit()
+        self._migrate()
 
         self._getter = self._conn
         self._putter = self._conn
@@ -109,17 +161,40 @@ class RatpySQLQueue(Logger):
         self.transaction_lock = threading.Lock()
         self.put_event = threading.Event()
 
+        self._pending_inserts = []
+        self._pending_deletes = []
+        self._prefetched = collections.deque()
+        self._last_flush = time.time()
+
         self._total = self._count()
+        self._next_timestamp = None
 
-        self.logger.debug(action='Open', status='OK', message='[{}]'.format(self.priority))
+        if (self.batch_size > 1 or self.prefetch > 1) and self.batch_interval > 0:
+            self._flush_task = task.LoopingCall(self._flush_if_needed)
+            self._flush_task.start(self.batch_interval, now=False)
+
+        self.logger.debug(action='Open', status='OK', message='[{}]', message_args=(self.priority,))
 
     def close(self):
-        self.logger.debug(action='Close', message='[{}]'.format(self.priority))
+        self.logger.debug(action='Close', message='[{}]', message_args=(self.priority,))
+
+        if self._flush_task and self._flush_task.running:
+            self._flush_task.stop()
+        self._flush()
+        self._prefetched.clear()
 
         self._getter.close()
         self._putter.close()
 
-        self.logger.debug(action='Close', status='OK', message='[{}]'.format(self.priority))
+        self.logger.debug(action='Close', status='OK', message='[{}]', message_args=(self.priority,))
+
+    def _migrate(self):
+        version = self._conn.execute('PRAGMA user_version;').fetchone()[0]
+        if version < self._SCHEMA_VERSION:
+            self._conn.execute(self._sql_create_index())
+            self._conn.execute('PRAGMA user_version={};'.format(self._SCHEMA_VERSION))
+            self._conn.commit()
+            self.logger.debug(action='Migration', status='OK', message='[{}] {} --> {}', message_args=(self.priority, version, self._SCHEMA_VERSION))
 
     # ####################################################### #
 
@@ -132,8 +207,8 @@ class RatpySQLQueue(Logger):
     # ####################################################### #
     # ####################################################### #
 
-    def _insert(self, request, timestamp):
-        args = (request, timestamp)
+    def _insert(self, request, timestamp, *args):
+        args = (request, timestamp, *args)
         with self.transaction_lock:
             with self._putter:
                 return self._putter.execute(self._sql_insert(), args)
@@ -148,6 +223,36 @@ class RatpySQLQueue(Logger):
             with self._putter:
                 return self._putter.execute(self._sql_delete(), args)
 
+    def _select_many(self, limit):
+        args = (time.time(), limit)
+        return self._getter.execute(self._sql_select_many(), args).fetchall()
+
+    def _flush(self):
+        if self._pending_inserts or self._pending_deletes:
+            with self.transaction_lock:
+                with self._putter:
+                    if self._pending_inserts:
+                        self._putter.executemany(self._sql_insert(), self._pending_inserts)
+                    if self._pending_deletes:
+                        self._putter.executemany(self._sql_delete(), self._pending_deletes)
+            self.logger.debug(action='Flush', status='OK', message='[{}] +{} -{}', message_args=(self.priority, len(self._pending_inserts), len(self._pending_deletes)))
+            self._pending_inserts = []
+            self._pending_deletes = []
+        self._last_flush = time.time()
+
+    def _flush_if_needed(self):
+        pending = len(self._pending_inserts) + len(self._pending_deletes)
+        if pending >= max(self.batch_size, 1) or time.time() - self._last_flush >= self.batch_interval:
+            self._flush()
+
+    def _insert_dictionary(self, rows):
+        with self.transaction_lock:
+            with self._putter:
+                return self._putter.executemany(self._sql_insert_dictionary(), rows)
+
+    def _select_dictionary(self):
+        return self._getter.execute(self._sql_select_dictionary()).fetchall()
+
     def _count(self):
         args = ()
         row = self._getter.execute(self._sql_count(), args).fetchone()
@@ -164,15 +269,25 @@ class RatpySQLQueue(Logger):
     def _table_name(self):
         return '`{}_{}`'.format(self._TABLE_NAME, self.name)
 
+    @property
+    def _index_name(self):
+        return '`{}_{}_timestamp`'.format(self._TABLE_NAME, self.name)
+
     def _sql_create(self):
         return self._SQL_CREATE.format(table_name=self._table_name)
 
+    def _sql_create_index(self):
+        return self._SQL_CREATE_INDEX.format(index_name=self._index_name, table_name=self._table_name)
+
     def _sql_insert(self):
         return self._SQL_INSERT.format(table_name=self._table_name)
 
     def _sql_select(self):
         return self._SQL_SELECT.format(table_name=self._table_name)
 
+    def _sql_select_many(self):
+        return self._SQL_SELECT_MANY.format(table_name=self._table_name)
+
     def _sql_delete(self):
         return self._SQL_DELETE.format(table_name=self._table_name)
 
@@ -182,27 +297,181 @@ class RatpySQLQueue(Logger):
     def _sql_select_older_timestamp(self):
         return self._SQL_SELECT_OLDER_TIMESTAMP.format(table_name=self._table_name)
 
+    @property
+    def _dictionary_table_name(self):
+        return '`{}_{}`'.format(self._DICTIONARY_TABLE_NAME, self.name)
+
+    def _sql_create_dictionary(self):
+        return self._SQL_CREATE_DICTIONARY.format(table_name=self._dictionary_table_name)
+
+    def _sql_insert_dictionary(self):
+        return self._SQL_INSERT_DICTIONARY.format(table_name=self._dictionary_table_name)
+
+    def _sql_select_dictionary(self):
+        return self._SQL_SELECT_DICTIONARY.format(table_name=self._dictionary_table_name)
+
     # ####################################################### #
 
-    def push(self, request, timestamp):
-        self._insert(request, timestamp)
+    def push(self, request, timestamp, *args):
+        if not self._total:
+            self._next_timestamp = timestamp
+        elif self._next_timestamp is not None:
+            self._next_timestamp = min(self._next_timestamp, timestamp)
+        if self.batch_size > 1:
+            self._pending_inserts.append((request, timestamp, *args))
+            self._flush_if_needed()
+        else:
+            self._insert(request, timestamp, *args)
         self.put_event.set()
         self._total += 1
-        self.logger.debug(action='Push', status='OK', message='[{}]'.format(self.priority))
+        self.logger.debug(action='Push', status='OK', message='[{}]', message_args=(self.priority,))
         return True
 
     def pop(self):
-        row = self._select()
+        next_timestamp = self.next_timestamp
+        if next_timestamp is None or next_timestamp >= time.time():
+            row = None
+            self._flush_if_needed()
+        elif self.prefetch > 1:
+            row = self._pop_prefetched()
+        else:
+            row = self._pop_single()
         if row and row[0] is not None:
-            self._delete(row[0])
             self._total -= 1
             request = row[1]
-            self.logger.debug(action='Pop', status='OK', message='[{}]'.format(self.priority))
+            self.logger.debug(action='Pop', status='OK', message='[{}]', message_args=(self.priority,))
         else:
             request = None
-            self.logger.debug(action='Pop', status='NO', message='[{}]'.format(self.priority))
+            self.logger.debug(action='Pop', status='NO', message='[{}]', message_args=(self.priority,))
         return request
 
+    def _pop_single(self):
+        if self._pending_inserts:
+            self._flush()
+        row = self._select()
+        if row and row[0] is not None:
+            self._delete(row[0])
+            # The last column holds the oldest timestamp left once this row is removed
+            self._next_timestamp = row[-1]
+        return row
+
+    def _pop_prefetched(self):
+        if not self._prefetched:
+            self._flush()
+            self._prefetched.extend(self._select_many(self.prefetch))
+            self._next_timestamp = None
+        if not self._prefetched:
+            return None
+        row = self._prefetched.popleft()
+        self._pending_deletes.append((row[0],))
+        self._flush_if_needed()
+        return row
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
+
+
+class RatpySQLPriorityQueue(RatpySQLQueue):
+
+    """ Ratpy SQL Priority Queue class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    name = 'ratpy.queue.sql.priority'
+
+    _priorities = None
+
+    _SQL_CREATE = 'CREATE TABLE IF NOT EXISTS {table_name} (_id INTEGER PRIMARY KEY AUTOINCREMENT, data BLOB, timestamp FLOAT, priority INTEGER)'
+    _SQL_CREATE_INDEX = 'CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} (priority, timestamp, _id)'
+    _SQL_CREATE_TIMESTAMP_INDEX = 'CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} (timestamp)'
+    _SQL_INSERT = 'INSERT INTO {table_name} (data, timestamp, priority) VALUES (?, ?, ?)'
+    # one index seek per known priority, sorting every due row by priority on each pop grows with the queue
+    _SQL_SELECT = 'SELECT _id, data, timestamp, priority, (SELECT timestamp FROM {table_name} WHERE _id != head._id ORDER BY timestamp ASC LIMIT 1) FROM {table_name} AS head WHERE priority = ? AND timestamp < ? ORDER BY timestamp ASC, _id ASC LIMIT 1'
+    _SQL_SELECT_MANY = 'SELECT _id, data, timestamp, priority FROM {table_name} WHERE priority = ? AND timestamp < ? ORDER BY timestamp ASC, _id ASC LIMIT ?'
+    _SQL_COUNT_PRIORITIES = 'SELECT priority, COUNT(_id) FROM {table_name} GROUP BY priority'
+
+    # ####################################################### #
+
+    @property
+    def infos(self):
+        infos = super().infos
+        infos['priorities'] = dict(self._priorities or {})
+        return infos
+
+    @property
+    def priorities(self):
+        return sorted(self._priorities)
+
+    # ####################################################### #
+
+    def open(self):
+        super().open()
+        self._priorities = dict(self._getter.execute(self._sql_count_priorities()).fetchall())
+
+    def _migrate(self):
+        super()._migrate()
+        self._conn.execute(self._sql_create_timestamp_index())
+        self._conn.commit()
+
+    # ####################################################### #
+
+    @property
+    def _index_name(self):
+        return '`{}_{}_priority`'.format(self._TABLE_NAME, self.name)
+
+    @property
+    def _timestamp_index_name(self):
+        return '`{}_{}_timestamp`'.format(self._TABLE_NAME, self.name)
+
+    def _sql_create_timestamp_index(self):
+        return self._SQL_CREATE_TIMESTAMP_INDEX.format(index_name=self._timestamp_index_name, table_name=self._table_name)
+
+    def _sql_count_priorities(self):
+        return self._SQL_COUNT_PRIORITIES.format(table_name=self._table_name)
+
+    # ####################################################### #
+
+    def _select(self):
+        now = time.time()
+        for priority in sorted(self._priorities):
+            row = self._getter.execute(self._sql_select(), (priority, now)).fetchone()
+            if row:
+                return row
+        return None
+
+    def _select_many(self, limit):
+        now = time.time()
+        rows = []
+        for priority in sorted(self._priorities):
+            rows.extend(self._getter.execute(self._sql_select_many(), (priority, now, limit - len(rows))).fetchall())
+            if len(rows) >= limit:
+                break
+        return rows
+
+    # ####################################################### #
+
+    def push(self, request, timestamp, priority=0):
+        self._priorities[priority] = self._priorities.get(priority, 0) + 1
+        return super().push(request, timestamp, priority)
+
+    def _pop_single(self):
+        return self._popped(super()._pop_single())
+
+    def _pop_prefetched(self):
+        return self._popped(super()._pop_prefetched())
+
+    def _popped(self, row):
+        if row and row[0] is not None:
+            priority = row[3]
+            self._priorities[priority] -= 1
+            if not self._priorities[priority]:
+                del self._priorities[priority]
+        return row
+
     # ####################################################### #
     # ####################################################### #
 
@@ -12,6 +12,7 @@ RESOURCES_DIR = './resources/'
 
 # WORK
 WORK_DIR = './work/'
+INDEX_SEGMENT_SIZE = 1000
 
 # LOGS
 LOG_ENABLED = True
@@ -28,6 +29,9 @@ LOG_IN_FILES = True
 LOG_LEVEL_IN_FILES = 'INFO'
 LOG_IN_ONE_FILE = True
 LOG_LEVEL_IN_ONE_FILE = 'INFO'
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 5
+LOG_FLUSH_INTERVAL = 1000
 LOG_SHORT_NAMES = False
 LOG_STDOUT = False
 
@@ -94,6 +98,7 @@ SCRAPER_SLOT_MAX_ACTIVE_SIZE = 5000000
 SPIDER_LOADER_CLASS = 'scrapy.spiderloader.SpiderLoader'
 SPIDER_LOADER_WARN_ONLY = False
 SPIDER_MODULES = ['projects']
+SUBSPIDERS_ROUTES_CACHE_SIZE = 10000
 
 # MAILER
 MAIL_HOST = 'localhost'
@@ -135,9 +140,50 @@ DNS_TIMEOUT = 60
 # SCHEDULER
 SCHEDULER = 'ratpy.config.scheduler.RatpyScheduler'
 SCHEDULER_DISK_QUEUE = 'ratpy.config.scheduler.queues.RatpyDiskQueue'
-SCHEDULER_MEMORY_QUEUE = 'ratpy.config.scheduler.queues.RatpyMemoryQueue'
+SCHEDULER_MEMORY_QUEUE = 'ratpy.config.scheduler.queues.RatpyHeapMemoryQueue'
 SCHEDULER_PRIORITY_QUEUE = 'ratpy.config.scheduler.queues.RatpyPriorityQueue'
+SCHEDULER_DISK_PRIORITY_QUEUE = 'ratpy.config.scheduler.queues.RatpyPriorityQueue'
+# Round robin across domains with free downloader slots :
+# SCHEDULER_PRIORITY_QUEUE = 'ratpy.config.scheduler.queues.RatpyDomainQueue'
+# SCHEDULER_DISK_PRIORITY_QUEUE = 'ratpy.config.scheduler.queues.RatpyDomainQueue'
+# One sqlite file for every priority (set both) :
+# SCHEDULER_DISK_PRIORITY_QUEUE = 'ratpy.config.scheduler.queues.RatpyFrontierQueue'
+# SCHEDULER_DISK_QUEUE = 'ratpy.config.scheduler.queues.RatpyDiskFrontier'
 DUPEFILTER_CLASS = 'ratpy.config.scheduler.dupefilter.RatpyDupefilter'
+FINGERPRINT_ALGORITHM = 'sha1'
+FINGERPRINT_DIGEST_SIZE = 0
+FINGERPRINT_CACHE_SIZE = 100000
+DUPEFILTER_JOURNAL_BATCH_SIZE = 1000
+DUPEFILTER_JOURNAL_BATCH_INTERVAL = 1000
+DUPEFILTER_JOURNAL_FSYNC = True
+DUPEFILTER_JOURNAL_COMPACT_RATIO = 2.0
+# Sorted digests memory-mapped from work/scheduler/dupefilter/digests.npy :
+# DUPEFILTER_CLASS = 'ratpy.config.scheduler.dupefilter.digeststore.RatpyDigestDupefilter'
+DUPEFILTER_DIGEST_SIZE = 8
+DUPEFILTER_DIGEST_MERGE_SIZE = 100000
+# Scalable bloom filter persisted to work/scheduler/dupefilter/requests.bloom (false positives allowed) :
+# DUPEFILTER_CLASS = 'ratpy.config.scheduler.dupefilter.bloom.RatpyBloomDupefilter'
+DUPEFILTER_BLOOM_ERROR_RATE = 0.001
+DUPEFILTER_BLOOM_CAPACITY = 1000000
+DUPEFILTER_BLOOM_MEMORY = 0
+DUPEFILTER_BLOOM_SNAPSHOT_SIZE = 100000
+# One entry per canonical URL, refreshed by later Interval recrawls :
+# DUPEFILTER_CLASS = 'ratpy.config.scheduler.dupefilter.expiring.RatpyExpiringDupefilter'
+DUPEFILTER_EXPIRY = 0
+DUPEFILTER_EXPIRY_SWEEP_INTERVAL = 3600
+SCHEDULER_DISK_QUEUE_BATCH_SIZE = 0
+SCHEDULER_DISK_QUEUE_BATCH_INTERVAL = 1000
+SCHEDULER_DISK_QUEUE_PREFETCH = 0
+SCHEDULER_DISK_QUEUE_SYNCHRONOUS = 'FULL'
+# Compact versioned request codec with a dictionary table stored in the queue (smaller rows, faster encode and decode than the default pickle queue) :
+# SCHEDULER_DISK_QUEUE = 'ratpy.config.scheduler.queues.RatpyCompactDiskQueue'
+SCHEDULER_CODEC_COMPRESS_MIN_SIZE = 1024
+SCHEDULER_CODEC_COMPRESS_LEVEL = 6
+# Memory heap spilling to sqlite (per priority) :
+# SCHEDULER_DISK_QUEUE = 'ratpy.config.scheduler.queues.RatpyHybridDiskQueue'
+SCHEDULER_HYBRID_QUEUE_MEMORY_SIZE = 10000
+SCHEDULER_HYBRID_QUEUE_MEMORY_BYTES = 0
+SCHEDULER_HYBRID_QUEUE_REFILL_SIZE = 1000
 
 # SHELL
 DEFAULT_ITEM_CLASS = 'scrapy.item.Item'
@@ -29,10 +29,20 @@ class Request(scrapy.Request):
 
     timestamp = None
 
+    _parsed_url = None
+
     def __init__(self, *args, url='', timestamp=None, **kwargs):
         scrapy.Request.__init__(self, url, *args, **kwargs)
         self.timestamp = timestamp if timestamp else None
 
+    @property
+    def parsed_url(self):
+        """ URL of the request, parsed once. """
+
+        if self._parsed_url is None:
+            self._parsed_url = URL(self.url)
+        return self._parsed_url
+
     @staticmethod
     def create(value, *args, origin='', **kwargs):
 
@@ -55,7 +65,7 @@ class Request(scrapy.Request):
 
         names = ['method', 'headers', 'body', 'cookies', 'meta', 'flags', 'encoding', 'priority', 'timestamp', 'dont_filter', 'cb_kwargs']
         attributes = {name: getattr(self, name, None) for name in names}
-        attributes['url'] = URL(self.url)
+        attributes['url'] = self.parsed_url
 
         return attributes
 
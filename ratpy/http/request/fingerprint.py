@@ -1,5 +1,6 @@
 """ Ratpy Request FingerPrint module"""
 
+import functools
 import hashlib
 import weakref
 from w3lib.url import canonicalize_url  # pylint: disable=import-error
@@ -9,22 +10,115 @@ from ratpy.utils import to_bytes
 # ############################################################### #
 # ############################################################### #
 
-REQUEST_FINGERPRINT_CACHE = weakref.WeakKeyDictionary()
+FINGERPRINT_CHUNK_SIZE = 1 << 20
+FINGERPRINT_CACHE_BODY_SIZE = 1 << 10
 
 # ############################################################### #
 
 
-def request_fingerprint(request):
+class RequestFingerprinter:
 
-    cache = REQUEST_FINGERPRINT_CACHE.setdefault(request, {})
-    cache_key = (request.method, str(request.timestamp), tuple(to_bytes(h.lower()) for h in sorted(request.cb_kwargs)))
-    if cache_key not in cache:
-        _fp = hashlib.sha1()
-        _fp.update(to_bytes(canonicalize_url(request.url, keep_fragments=False, keep_blank_values=False)))
-        _fp.update(to_bytes(str(request.timestamp)))
-        _fp.update(request.body or b'')
-        cache[cache_key] = _fp.hexdigest()
-    return cache[cache_key]
+    """ Ratpy Request Fingerprinter class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    algorithm = None
+    digest_size = None
+    cache_size = None
+
+    _hash = None
+    _canonicalize = None
+    _digest = None
+    _responses = None
+
+    # ####################################################### #
+
+    def __init__(self, algorithm='sha1', digest_size=0, cache_size=100000):
+
+        self.algorithm = algorithm
+        self.cache_size = cache_size
+
+        if algorithm in ('blake2b', 'blake2s'):
+            self._hash = functools.partial(getattr(hashlib, algorithm), digest_size=digest_size) if digest_size else getattr(hashlib, algorithm)
+        else:
+            self._hash = functools.partial(hashlib.new, algorithm)
+        full_size = self._hash().digest_size
+        if digest_size and not 4 <= digest_size <= full_size:
+            raise ValueError('Fingerprint digest size must be between 4 and {} bytes for {} : {}'.format(full_size, algorithm, digest_size))
+        self.digest_size = digest_size or full_size
+
+        self._canonicalize = functools.lru_cache(maxsize=cache_size)(self._canonical_url)
+        self._digest = functools.lru_cache(maxsize=cache_size)(self._request_digest)
+        self._responses = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.get('FINGERPRINT_ALGORITHM', 'sha1'), settings.getint('FINGERPRINT_DIGEST_SIZE', 0), settings.getint('FINGERPRINT_CACHE_SIZE', 100000))
+
+    # ####################################################### #
+
+    @property
+    def infos(self):
+        cache = self._digest.cache_info()
+        return {
+            'algorithm': self.algorithm,
+            'digest_size': self.digest_size,
+            'cache_size': self.cache_size,
+            'cache_hits': cache.hits,
+            'cache_misses': cache.misses
+            }
+
+    # ####################################################### #
+    # ####################################################### #
+
+    @staticmethod
+    def _canonical_url(url):
+        return to_bytes(canonicalize_url(url, keep_fragments=False, keep_blank_values=False))
+
+    def _request_digest(self, url, timestamp, body):
+        _fp = self._hash()
+        _fp.update(self._canonicalize(url))
+        _fp.update(to_bytes(timestamp))
+        _fp.update(body)
+        return _fp.digest()[:self.digest_size]
+
+    def fingerprint(self, request, keep_timestamp=True):
+        """ Digest of the canonical url, the timestamp and the body, cached by raw url for small bodies. """
+
+        timestamp = str(request.timestamp if keep_timestamp else None)
+        body = request.body or b''
+        # the cache would keep large bodies alive, and hashing them costs as much as a lookup key would
+        if len(body) > FINGERPRINT_CACHE_BODY_SIZE:
+            return self._request_digest(request.url, timestamp, body)
+        return self._digest(request.url, timestamp, body)
+
+    def response_fingerprint(self, response):
+        """ Digest of the canonical request url and the response body, read by chunks. """
+
+        digest = self._responses.get(response)
+        if digest is None:
+            _fp = self._hash()
+            _fp.update(self._canonicalize(response.request.url))
+            body = memoryview(response.body or b'')
+            for start in range(0, len(body), FINGERPRINT_CHUNK_SIZE):
+                _fp.update(body[start:start+FINGERPRINT_CHUNK_SIZE])
+            digest = _fp.digest()[:self.digest_size]
+            self._responses[response] = digest
+        return digest
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+
+DEFAULT_FINGERPRINTER = RequestFingerprinter()
+
+# ############################################################### #
+
+
+def request_fingerprint(request, keep_timestamp=True):
+    return DEFAULT_FINGERPRINTER.fingerprint(request, keep_timestamp=keep_timestamp).hex()
 
 # ############################################################### #
 # ############################################################### #
@@ -1,6 +1,7 @@
 """ Ratpy Request Serialization module """
 
 import inspect
+import weakref
 
 from ratpy.utils import to_unicode, load_object
 from ratpy.http.request import Request
@@ -80,6 +81,71 @@ def request_from_dict(dic, spider=None):
 # ############################################################### #
 
 
+class CallbackRegistry:
+
+    """ Ratpy Callback Registry class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    _names = None
+    _methods = None
+
+    # ####################################################### #
+
+    def __init__(self, obj):
+
+        self._names = {}
+        self._methods = {}
+
+        cls = type(obj)
+        for name in dir(cls):
+            value = inspect.getattr_static(cls, name, None)
+            if inspect.isfunction(value):
+                self._names.setdefault(value, name)
+                self._methods[name] = value
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def name(self, obj, func):
+        name = self._names.get(func.__func__)
+        if name is None:
+            for name, obj_func in inspect.getmembers(obj, predicate=inspect.ismethod):
+                if obj_func.__func__ is func.__func__:
+                    self._names[func.__func__] = name
+                    break
+            else:
+                return None
+        return name
+
+    def method(self, obj, name):
+        func = self._methods.get(name)
+        if func is None or name in vars(obj):
+            return getattr(obj, name)
+        return func.__get__(obj, type(obj))
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+
+_REGISTRIES = weakref.WeakKeyDictionary()
+
+
+def register_callbacks(obj):
+    registry = CallbackRegistry(obj)
+    _REGISTRIES[obj] = registry
+    return registry
+
+
+def callback_registry(obj):
+    registry = _REGISTRIES.get(obj)
+    return registry if registry is not None else register_callbacks(obj)
+
+# ############################################################### #
+
+
 def _find_method(obj, func):
     if obj:
         try:
@@ -88,10 +154,9 @@ def _find_method(obj, func):
             pass
         else:
             if func_self is obj:
-                members = inspect.getmembers(obj, predicate=inspect.ismethod)
-                for name, obj_func in members:
-                    if obj_func.__func__ is func.__func__:
-                        return name
+                name = callback_registry(obj).name(obj, func)
+                if name is not None:
+                    return name
     # print('Function {} is not a method of : {}'.format(func, obj))
     raise ValueError('Function {} is not a method of : {}'.format(func, obj))
 
@@ -101,7 +166,7 @@ def _find_method(obj, func):
 def _get_method(obj, name):
     name = str(name)
     try:
-        return getattr(obj, name)
+        return callback_registry(obj).method(obj, name)
     except AttributeError:
         pass
     # print('Method {} not found in : {}'.format(name, obj))
@@ -2,6 +2,9 @@
 
 import scrapy
 
+from ratpy.http.request import Request
+from ratpy.http.url import URL
+
 __all__ = ['Response', 'IgnoreResponse']
 
 # ############################################################### #
@@ -22,10 +25,24 @@ class Response(scrapy.http.TextResponse):
     # ####################################################### #
     # ####################################################### #
 
+    _parsed_url = None
+
     def __init__(self, *args, **kwargs):
 
         scrapy.http.TextResponse.__init__(self, *args, **kwargs)
 
+    @property
+    def parsed_url(self):
+        """ URL of the response, shared with its request when not redirected. """
+
+        if self._parsed_url is None:
+            request = self.request
+            if isinstance(request, Request) and request.url == self.url:
+                self._parsed_url = request.parsed_url
+            else:
+                self._parsed_url = URL(self.url)
+        return self._parsed_url
+
     def get_attributes(self):
 
         names = ['status', 'headers', 'body', 'request', 'flags', 'certificate']
@@ -1,10 +1,64 @@
 """ Ratpy URL module """
 
+import functools
 import re
 
 # ############################################################### #
 # ############################################################### #
 
+URL_CACHE_SIZE = 10000
+
+_PROTOCOL = re.compile('[a-zA-Z]+://')
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile(regex):
+    return re.compile('^'+regex)
+
+
+@functools.lru_cache(maxsize=URL_CACHE_SIZE)
+def _parse(url):
+    if '?' not in url and not url.endswith('/'):
+        return url, _URLState(url, None)
+    path = URL.extract_path(url)
+    params = URL.extract_params(url)
+    return URL._url(path, params), _URLState(path, params)
+
+# ############################################################### #
+
+
+class _URLState:
+
+    """ Parsed state shared by the URL objects of a same string """
+
+    __slots__ = ('path', '_params', '_domain', '_remaining')
+
+    def __init__(self, path, params):
+        self.path = path
+        self._params = params
+        self._domain = None
+        self._remaining = None
+
+    @property
+    def params(self):
+        if self._params is None:
+            self._params = {}
+        return self._params
+
+    @property
+    def domain(self):
+        if self._domain is None:
+            self._domain = self.remaining.split('/', 1)[0]
+        return self._domain
+
+    @property
+    def remaining(self):
+        if self._remaining is None:
+            self._remaining = URL._remove_protocol(self.path)
+        return self._remaining
+
+# ############################################################### #
+
 
 class URL(str):
 
@@ -13,31 +67,32 @@ class URL(str):
     # ####################################################### #
     # ####################################################### #
 
-    _domain = None
-    _path = None
-    _params = None
-    _remaining = None
+    __slots__ = ('_state', '_remaining')
 
     # ####################################################### #
 
     def __new__(cls, url, remaining=None, **kwargs):
 
-        _domain = URL.extract_domain(url)
-        _path = URL.extract_path(url)
-        _params = URL.extract_params(url)
-        _remaining = remaining if remaining is not None else URL.extract_remaining(url)
-
-        _params.update(kwargs)
-
-        self = str.__new__(cls, URL._url(_path, _params))
-        self._domain = _domain
-        self._path = _path
-        self._params = _params
-        self._remaining = _remaining
+        if isinstance(url, URL) and not kwargs:
+            self = str.__new__(cls, url)
+            self._state = url._state
+        else:
+            value, state = _parse(url or '')
+            if kwargs:
+                params = dict(state.params)
+                params.update(kwargs)
+                value, state = URL._url(state.path, params), _URLState(state.path, params)
+            self = str.__new__(cls, value)
+            self._state = state
+
+        self._remaining = remaining
         return self
 
     def __call__(self):
-        return URL(URL._url(self.path, self._params))
+        return URL(URL._url(self.path, self._state.params))
+
+    def __reduce__(self):
+        return self.__class__, (str(self), self._remaining)
 
     # ####################################################### #
 
@@ -58,7 +113,9 @@ class URL(str):
 
     @staticmethod
     def _remove_protocol(path):
-        search = re.search('[a-zA-Z]+://', path)
+        if '://' not in path:
+            return path
+        search = _PROTOCOL.search(path)
         return path[search.end():] if search else path
 
     # #######################################################
@@ -69,7 +126,7 @@ class URL(str):
 
     @property
     def domain(self):
-        return self._domain
+        return self._state.domain
 
     # ####################################################### #
     # ####################################################### #
@@ -80,7 +137,7 @@ class URL(str):
 
     @property
     def path(self):
-        return self._path
+        return self._state.path
 
     # ####################################################### #
 
@@ -96,7 +153,8 @@ class URL(str):
 
     @property
     def params(self):
-        return self._params
+        # the parsed state is shared with every URL of the same string
+        return dict(self._state.params)
 
     # ####################################################### #
     # ####################################################### #
@@ -107,7 +165,7 @@ class URL(str):
 
     @property
     def remaining(self):
-        return self._remaining
+        return self._remaining if self._remaining is not None else self._state.remaining
 
     # ####################################################### #
     # ####################################################### #
@@ -115,7 +173,7 @@ class URL(str):
     def match(self, regex):
         if regex:
             if len(self.remaining) > 0 and isinstance(regex, str):
-                return bool(re.search(re.compile('^'+regex), self.remaining))
+                return bool(_compile(regex).search(self.remaining))
             return False
         else:
             return True
@@ -123,7 +181,7 @@ class URL(str):
     def next(self, regex):
         if regex:
             if len(self.remaining) > 0 and isinstance(regex, str):
-                search = re.search(re.compile('^'+regex), self.remaining)
+                search = _compile(regex).search(self.remaining)
                 return URL(self, remaining=self.remaining[search.end():] if search else '')
         else:
             return self
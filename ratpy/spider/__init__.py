@@ -8,6 +8,7 @@ from ratpy.utils import Utils, Attribute, monitored
 from ratpy.utils.index import Index
 
 from ratpy.http.request import Request
+from ratpy.http.response import Response
 from ratpy.http.url import URL
 from ratpy.link import Link
 from ratpy.item import Item
@@ -167,7 +168,7 @@ class Spider(Utils, scrapy.Spider):
     @classmethod
     def handles_request(cls, request):
 
-        url = URL(request.url)
+        url = request.parsed_url if isinstance(request, Request) else URL(request.url)
 
         if isinstance(cls.subspiders_cls, SubSpider):
             return cls.subspiders_cls.handles(url)
@@ -181,9 +182,9 @@ class Spider(Utils, scrapy.Spider):
 
     def parse(self, response, *args, **kwargs):
 
-        url = URL(response.url if response is not None else '')
+        url = response.parsed_url if isinstance(response, Response) else URL(response.url if response is not None else '')
 
-        self.logger.debug(action='Parse', message='{} {}'.format( url.path, url.params))
+        self.logger.debug(action='Parse', message='{} {}', message_args=(url.path, url.params))
 
         if len(url.remaining) > 0:
             self.logger.debug('New parse !')
@@ -214,7 +215,7 @@ class Spider(Utils, scrapy.Spider):
                     self.logger.debug('Other result !')
                     yield from []
 
-        self.logger.debug(action='Parse', status='OK', message='{} {}'.format( url.path, url.params))
+        self.logger.debug(action='Parse', status='OK', message='{} {}', message_args=(url.path, url.params))
 
     # ####################################################### #
     # ####################################################### #
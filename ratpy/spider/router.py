@@ -0,0 +1,168 @@
+""" Ratpy SubSpider Router module """
+
+import functools
+import re
+
+from ratpy.http.url import URL
+
+__all__ = ['Route', 'SubSpiderRouter', 'ROUTE_META_KEY']
+
+# ############################################################### #
+# ############################################################### #
+
+ROUTE_META_KEY = 'ratpy_route'
+
+_REGEX_SPECIALS = '.^$*+?{}[]|()'
+_REGEX_QUANTIFIERS = '*?{'
+
+
+def _literal_prefix(regex):
+    """ Longest literal string every match of the regex starts with. """
+
+    if '|' in regex:
+        return ''
+
+    prefix = []
+    index = 0
+    while index < len(regex):
+        char = regex[index]
+        if char == '\\':
+            if index + 1 >= len(regex) or regex[index + 1].isalnum():
+                break
+            char = regex[index + 1]
+            index += 2
+        elif char in _REGEX_SPECIALS:
+            break
+        else:
+            index += 1
+        if index < len(regex) and regex[index] in _REGEX_QUANTIFIERS:
+            break
+        prefix.append(char)
+    return ''.join(prefix)
+
+# ############################################################### #
+
+
+class Route:
+
+    """ Ratpy Route class """
+
+    __slots__ = ('subspider', 'remaining', 'children', 'key')
+
+    def __init__(self, subspider, remaining, children, consumed=0):
+        self.subspider = subspider
+        self.remaining = remaining
+        self.children = children
+        # picklable form : subspider names and consumed lengths only
+        self.key = (subspider.name, consumed, tuple(child.key for child in children)) if subspider is not None else None
+
+    def __bool__(self):
+        return self.subspider is not None
+
+    def steps(self, url):
+        """ Matching subspiders in tree order, with the url they receive. """
+
+        if self.subspider is not None:
+            yield self.subspider, url if self.remaining == url.remaining else URL(url, remaining=self.remaining)
+            for child in self.children:
+                yield from child.steps(url)
+
+# ############################################################### #
+
+
+class SubSpiderRouter:
+
+    """ Ratpy SubSpider Router class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    root = None
+    cache_size = None
+
+    _table = None
+    _subspiders = None
+    _resolve = None
+    _restore = None
+
+    # ####################################################### #
+
+    def __init__(self, root, cache_size=10000):
+
+        self.root = root
+        self.cache_size = cache_size
+
+        self._subspiders = {}
+        self._table = self._compile(root)
+        self._resolve = functools.lru_cache(maxsize=cache_size)(self._resolve_remaining)
+        self._restore = functools.lru_cache(maxsize=cache_size)(self._restore_key)
+
+    # ####################################################### #
+
+    @property
+    def infos(self):
+        cache = self._resolve.cache_info()
+        return {'cache_size': self.cache_size, 'cache_hits': cache.hits, 'cache_misses': cache.misses}
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def _compile(self, subspider):
+        regex = subspider.regex if isinstance(subspider.regex, str) else ''
+        self._subspiders[subspider.name] = subspider
+        return (
+            subspider,
+            subspider.enabled,
+            _literal_prefix(regex),
+            re.compile(regex) if regex else None,
+            tuple(self._compile(_subspider) for _, _subspider in subspider.subspiders)
+            )
+
+    def _match(self, node, remaining):
+        subspider, enabled, prefix, pattern, children = node
+        if not enabled:
+            return None
+        consumed = 0
+        if pattern is not None:
+            if not remaining or not remaining.startswith(prefix):
+                return None
+            search = pattern.match(remaining)
+            if search is None:
+                return None
+            consumed = search.end()
+            remaining = remaining[consumed:]
+        return Route(subspider, remaining, tuple(filter(None, (self._match(child, remaining) for child in children))), consumed)
+
+    def _resolve_remaining(self, remaining):
+        return self._match(self._table, remaining) or Route(None, remaining, ())
+
+    def _restore_key(self, remaining, key):
+        name, consumed, children = key
+        subspider = self._subspiders.get(name)
+        if subspider is None:
+            raise KeyError(name)
+        remaining = remaining[consumed:]
+        return Route(subspider, remaining, tuple(self._restore_key(remaining, child) for child in children), consumed)
+
+    def route(self, url, request=None):
+        """ Route of the url, reusing and saving the one carried by the request meta. """
+
+        if request is None:
+            return self._resolve(url.remaining)
+
+        saved = request.meta.get(ROUTE_META_KEY)
+        if saved is not None and saved[0] == url.remaining:
+            try:
+                return self._restore(*saved) if saved[1] is not None else Route(None, url.remaining, ())
+            except KeyError:
+                pass
+
+        route = self._resolve(url.remaining)
+        request.meta[ROUTE_META_KEY] = (url.remaining, route.key)
+        return route
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+# ############################################################### #
@@ -9,13 +9,14 @@ import time
 from collections.abc import Iterable
 
 from ratpy.utils import Utils, Attribute, Function, monitored
-from ratpy.utils.index import Index
+from ratpy.utils.index import Index, StatusIndex
 from ratpy.http.request import Request, IgnoreRequest
 from ratpy.http.response import Response, IgnoreResponse
 from ratpy.http.url import URL
 from ratpy.link import Link
 from ratpy.item import Item
 from ratpy.interval import Interval
+from ratpy.spider.router import SubSpiderRouter
 
 __all__ = [
     'SubSpider', 'init_subspiders', 'SUBSPIDERS_CLS_ERROR',
@@ -66,6 +67,7 @@ class SubSpider(Utils):
     subspiders = None
 
     _state = None
+    _router = None
     _index_status = None
     _index_items = None
 
@@ -91,7 +93,7 @@ class SubSpider(Utils):
         self.subspiders = self.subspiders.items()
 
         self._state = STOP if self.enabled else DISABLED
-        self._index_status = Index(self.spider.crawler, directory=self.directory, name=self.name + '.status', columns=['status', 'url', 'args', 'kwargs'])
+        self._index_status = StatusIndex(self.spider.crawler, directory=self.directory, name=self.name + '.status', columns=['status', 'url', 'args', 'kwargs'])
         self._index_items = Index(self.spider.crawler, directory=self.directory, name=self.name + '.items', columns=['url', 'pipeline'])
 
         self.logger.debug(action='Initialisation', status='OK')
@@ -146,6 +148,7 @@ class SubSpider(Utils):
         infos['regex'] = self.regex
         infos['interval'] = (self.interval, str(self.interval))
         infos['index'] = self._index_status.infos
+        infos['router'] = self._router.infos if self._router is not None else None
         infos['subspiders'] = {_name: _step.infos for _name, _step in self.subspiders}
         return infos
 
@@ -156,6 +159,8 @@ class SubSpider(Utils):
         Utils.open(self)
 
         if self._state == STOP:
+            if self is self.spider.subspiders:
+                self.compile()
             self._index_status.open()
             self._index_items.open()
             self._state = START
@@ -200,6 +205,25 @@ class SubSpider(Utils):
     def next(cls, url):
         return url.next(cls.regex) if cls.enabled else URL('')
 
+    # ####################################################### #
+
+    def compile(self):
+        self._router = SubSpiderRouter(self, self.crawler.settings.getint('SUBSPIDERS_ROUTES_CACHE_SIZE', 10000))
+        self.logger.debug(action='Compile', status='OK')
+        return self._router
+
+    def route(self, url, request=None):
+        return (self._router or self.compile()).route(url, request)
+
+    def last_parsed(self, url):
+        """ Time of the last successful parse of the url, None if unknown. """
+
+        row = self._index_status.last(url=url, status=True)
+        return row['timestamp'] if row is not None else None
+
+    def parsed_items(self, url):
+        return [row['pipeline'] for row in self._index_items.lookup(url=url)]
+
     # ####################################################### #
     # ####################################################### #
 
@@ -227,120 +251,102 @@ class SubSpider(Utils):
     # ####################################################### #
 
     def enqueue_request_(self, request, url, *args, **kwargs):
-        self.logger.debug(action='Enqueue Request', message='{} {}'.format(url.path, url.params))
-
-        enqueue = True
-        if self.match(url):
-            url = self.next(url)
-
-            try:
-                enqueue = self.call_function('enqueue_request', True, request, url, *args, **kwargs)
-                if not enqueue:
-                    raise IgnoreRequest
-                self.logger.debug(action='Enqueue Request', status='OK', message='{} {}'.format(url.path, url.params))
-            except IgnoreRequest:
-                self.logger.debug(action='Enqueue Request', status='DROP', message='{} {}'.format(url.path, url.params))
+        for _subspider, _url in self.route(url, request).steps(url):
+            _subspider._enqueue_request(request, _url, *args, **kwargs)
+        return True
+
+    def _enqueue_request(self, request, url, *args, **kwargs):
+        try:
+            enqueue = self.call_function('enqueue_request', True, request, url, *args, **kwargs)
+            if not enqueue:
                 raise IgnoreRequest
-
-            for _, _subspider in self.subspiders:
-                enqueue = enqueue and _subspider.enqueue_request_(request, url, *args, **kwargs)
-        else:
-            self.logger.debug(action='Enqueue Request', status='SKIP', message='{} {}'.format(url.path, url.params))
-
-        return enqueue
+            self.logger.debug(action='Enqueue Request', status='OK', message='{} {}', message_args=(url.path, url.params))
+        except IgnoreRequest:
+            self.logger.debug(action='Enqueue Request', status='DROP', message='{} {}', message_args=(url.path, url.params))
+            raise IgnoreRequest
 
     # ####################################################### #
 
     def process_request_(self, request, url, *args, **kwargs):
-        self.logger.debug(action='Process Request', message='{} {}'.format(url.path, url.params))
-
-        if self.match(url):
-            url = self.next(url)
-
-            try:
-                request = self.call_function('process_request', request, request, url, *args, **kwargs)
-                if request is None:
-                    raise IgnoreRequest
-                self.logger.debug(action='Process Request', status='OK', message='{} {}'.format(url.path, url.params))
-            except IgnoreRequest:
-                self.logger.debug(action='Process Request', status='DROP', message='{} {}'.format(url.path, url.params))
-                raise IgnoreRequest
-
-            for _, _subspider in self.subspiders:
-                request = _subspider.process_request_(request, url, *args, **kwargs)
-        else:
-            self.logger.debug(action='Process Request', status='SKIP', message='{} {}'.format(url.path, url.params))
+        for _subspider, _url in self.route(url, request).steps(url):
+            request = _subspider._process_request(request, _url, *args, **kwargs)
+        return request
 
+    def _process_request(self, request, url, *args, **kwargs):
+        try:
+            request = self.call_function('process_request', request, request, url, *args, **kwargs)
+            if request is None:
+                raise IgnoreRequest
+            self.logger.debug(action='Process Request', status='OK', message='{} {}', message_args=(url.path, url.params))
+        except IgnoreRequest:
+            self.logger.debug(action='Process Request', status='DROP', message='{} {}', message_args=(url.path, url.params))
+            raise IgnoreRequest
         return request
 
     # ####################################################### #
 
     def process_response_(self, response, url, *args, **kwargs):
-        self.logger.debug(action='Process Response', message='{} {}'.format(url.path, url.params))
-
-        if self.match(url):
-            url = self.next(url)
-
-            try:
-                response = self.call_function('process_response', response, response, url, *args, **kwargs)
-                if response is None:
-                    raise IgnoreResponse
-                self.logger.debug(action='Process Response', status='OK', message='{} {}'.format(url.path, url.params))
-            except IgnoreResponse:
-                self.logger.debug(action='Process Response', status='DROP', message='{} {}'.format(url.path, url.params))
-                raise IgnoreResponse
-
-            for _, _subspider in self.subspiders:
-                response = _subspider.process_response_(response, url, *args, **kwargs)
-
-        else:
-            self.logger.debug(action='Process Response', status='SKIP', message='{} {}'.format(url.path, url.params))
+        for _subspider, _url in self.route(url, response.request).steps(url):
+            response = _subspider._process_response(response, _url, *args, **kwargs)
+        return response
 
+    def _process_response(self, response, url, *args, **kwargs):
+        try:
+            response = self.call_function('process_response', response, response, url, *args, **kwargs)
+            if response is None:
+                raise IgnoreResponse
+            self.logger.debug(action='Process Response', status='OK', message='{} {}', message_args=(url.path, url.params))
+        except IgnoreResponse:
+            self.logger.debug(action='Process Response', status='DROP', message='{} {}', message_args=(url.path, url.params))
+            raise IgnoreResponse
         return response
 
     # ####################################################### #
 
     def parse_(self, response, url, *args, **kwargs):
-        self.logger.debug(action='Parse', message='{} {}'.format(url.path, url.params))
+        route = self.route(url, response.request)
+        if route:
+            yield from route.subspider._parse(route, response, url, *args, **kwargs)
+        else:
+            self.logger.debug(action='Parse', status='SKIP', message='{} {}', message_args=(url.path, url.params))
+
+    def _parse(self, route, response, url, *args, **kwargs):
+        self.logger.debug(action='Parse', message='{} {}', message_args=(url.path, url.params))
 
         status = '!'
-        if self.match(url):
-            url = self.next(url)
-
-            response = self.call_function('process_input', response, response, url, *args, **kwargs)
-            if response is not None:
-                if len(url.remaining) == 0:
-                    status = False
-                    interval = self.interval
-                    results = self.call_function('parse', [], response, url, *args, **kwargs)
-                    for result in self.process_results_(results, url, *args, **kwargs):
-                        status = True
-                        if isinstance(result, Item):
-                            self._index_items.add(url=url, pipeline=result['pipeline'])
-                            self.logger.info(action='Parse', status='OK', message='{} {} --> \'{}\''.format(url.path, url.params, result['pipeline']))
-                        elif isinstance(result, Interval):
-                            interval = result
-                            continue
-                        yield result
-
-                    if interval > 0 and self.crawler.settings.get('COMMAND') in ['crawl', 'runspider']:
-                        yield Link(url, timestamp=time.time()+interval, cb_kwargs=kwargs.update(interval.cb_kwargs))
-                        self.logger.debug(action='Interval', status='OK', message='{} {} --> {}'.format(url.path, url.params, interval))
-                    else:
-                        self.logger.debug(action='Interval', status='NO', message='{} {}'.format(url.path, url.params))
-
-                    if status is False:
-                        self.logger.info(action='Parse', status='DROP', message='{} {}'.format(url.path, url.params))
-                    else:
-                        self.spider.crawler.stats.inc_value('subspiders/'+self.name)
+        url = url if route.remaining == url.remaining else URL(url, remaining=route.remaining)
+
+        response = self.call_function('process_input', response, response, url, *args, **kwargs)
+        if response is not None:
+            if len(url.remaining) == 0:
+                status = False
+                interval = self.interval
+                results = self.call_function('parse', [], response, url, *args, **kwargs)
+                for result in self.process_results_(results, url, *args, **kwargs):
+                    status = True
+                    if isinstance(result, Item):
+                        self._index_items.add(url=url, pipeline=result['pipeline'])
+                        self.logger.info(action='Parse', status='OK', message='{} {} --> \'{}\''.format(url.path, url.params, result['pipeline']))
+                    elif isinstance(result, Interval):
+                        interval = result
+                        continue
+                    yield result
+
+                if interval > 0 and self.crawler.settings.get('COMMAND') in ['crawl', 'runspider']:
+                    yield Link(url, timestamp=time.time()+interval, cb_kwargs=kwargs.update(interval.cb_kwargs))
+                    self.logger.debug(action='Interval', status='OK', message='{} {} --> {}', message_args=(url.path, url.params, interval))
                 else:
-                    status = '_'
-                    for _, _subspider in self.subspiders:
-                        results = _subspider.parse_(response, url, *args, **kwargs) or []
-                        yield from self.process_results_(results, url, *args, **kwargs)
-        else:
-            self.logger.debug(action='Parse', status='SKIP', message='{} {}'.format(url.path, url.params))
-            yield
+                    self.logger.debug(action='Interval', status='NO', message='{} {}', message_args=(url.path, url.params))
+
+                if status is False:
+                    self.logger.info(action='Parse', status='DROP', message='{} {}'.format(url.path, url.params))
+                else:
+                    self.spider.crawler.stats.inc_value('subspiders/'+self.name)
+            else:
+                status = '_'
+                for child in route.children:
+                    results = child.subspider._parse(child, response, url, *args, **kwargs)
+                    yield from self.process_results_(results, url, *args, **kwargs)
 
         self._index_status.add(status=status, url=url, args=str(args), kwargs=str(kwargs))
 
@@ -358,7 +364,7 @@ class SubSpider(Utils):
             self.logger.error(action='Format Results', status='SKIP', message='INVALID [{}] {} {}'.format(res.__class__.__name__, url.path, url.params))
             return []
 
-        self.logger.debug(action='Process Results', message='{} {}'.format(url.path, url.params))
+        self.logger.debug(action='Process Results', message='{} {}', message_args=(url.path, url.params))
 
         for result in filter(None, format_results(results)):
             if isinstance(result, Item):
@@ -377,7 +383,7 @@ class SubSpider(Utils):
                 yield from self.process_results_(result, url, *args, item=item, **kwargs)
         yield from []
 
-        self.logger.debug(action='Process Results', status='OK', message='{} {}'.format(url.path, url.params))
+        self.logger.debug(action='Process Results', status='OK', message='{} {}', message_args=(url.path, url.params))
 
     # ####################################################### #
     # ####################################################### #
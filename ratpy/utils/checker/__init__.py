@@ -146,7 +146,7 @@ class Checker(Logger):
         self.logger.error(action='User '+element, status='FAIL', message='[{}] Use value(s) {} for {}'.format(name, values_to_str(values), element))
 
     def _success(self, element, name, value):
-        self.logger.debug(action='User '+element, status='OK', message='[{}] --> {}'.format(name, value.__class__.__name__))
+        self.logger.debug(action='User '+element, status='OK', message='[{}] --> {}', message_args=(name, value.__class__.__name__))
 
     # ####################################################### #
     # ####################################################### #
@@ -1,17 +1,28 @@
 """ Ratpy Index module """
 
+import collections
+import csv
+import itertools
 import json
+import logging
 import os
+import sqlite3
+import sys
+import time
+from array import array
 import pandas
 
-from ratpy.utils import Logger, sizeof
-from ratpy.utils.path import create_file, work_directory
+from ratpy.utils import Logger
+from ratpy.utils.path import create_directory, work_directory
 
 # ############################################################### #
 # ############################################################### #
 
 DEFAULT_DIR = '../'
 
+INDEXED_COLUMNS = ('url', 'pipeline', 'value')
+SUMMARIZED_COLUMNS = ('status', 'pipeline')
+
 
 class Index(Logger):
 
@@ -26,9 +37,45 @@ class Index(Logger):
     crawler = None
 
     work_file = None
+    segment_size = None
 
+    _conn = None
     _columns = None
-    _index = None
+    _values = None
+    _labels = None
+    _segment = None
+    _timestamps = None
+    _length = None
+    _summaries = None
+    _distinct = None
+
+    _TABLE_NAME = 'rows'
+    _SQL_CREATE = 'CREATE TABLE IF NOT EXISTS {table_name} (_id INTEGER PRIMARY KEY AUTOINCREMENT, {definitions}, timestamp FLOAT)'
+    _SQL_CREATE_INDEX = 'CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({column}, _id)'
+    _SQL_INSERT = 'INSERT INTO {table_name} ({columns}, timestamp) VALUES ({values}, ?)'
+    _SQL_SELECT = 'SELECT {columns}, timestamp FROM {table_name}{where} ORDER BY _id {order}'
+    _SQL_COUNT = 'SELECT COUNT(_id) FROM {table_name}'
+    _SQL_COUNT_VALUES = 'SELECT {column}, COUNT(_id) FROM {table_name} GROUP BY {column}'
+
+    # summary : row count, rows per value of the summarized columns and distinct values of the others, kept up to date on flush
+    _SUMMARY_TABLE_NAME = 'summary'
+    _SQL_CREATE_SUMMARY = 'CREATE TABLE IF NOT EXISTS {table_name} (name TEXT PRIMARY KEY, value INTEGER)'
+    _SQL_SELECT_SUMMARY = 'SELECT name, value FROM {table_name}'
+    _SQL_REPLACE_SUMMARY = 'INSERT OR REPLACE INTO {table_name} (name, value) VALUES (?, ?)'
+    _SQL_DELETE_SUMMARY = 'DELETE FROM {table_name}'
+
+    _DISTINCT_TABLE_NAME = 'distinct_values'
+    _SQL_CREATE_DISTINCT = 'CREATE TABLE IF NOT EXISTS {table_name} (name TEXT, value TEXT, count INTEGER, PRIMARY KEY (name, value)) WITHOUT ROWID'
+    _SQL_UPSERT_DISTINCT = 'INSERT INTO {table_name} (name, value, count) VALUES (?, ?, ?) ON CONFLICT (name, value) DO UPDATE SET count = count + excluded.count'
+    _SQL_SELECT_DISTINCT = 'SELECT value, count FROM {table_name} WHERE name = ?'
+    _SQL_DELETE_DISTINCT = 'DELETE FROM {table_name}'
+
+    # values already stored for the other columns : a flush counts the ones it inserts
+    _VALUES_TABLE_NAME = 'column_values'
+    _SQL_CREATE_VALUES = 'CREATE TABLE IF NOT EXISTS {table_name} (name TEXT, value TEXT, PRIMARY KEY (name, value)) WITHOUT ROWID'
+    _SQL_INSERT_VALUES = 'INSERT OR IGNORE INTO {table_name} (name, value) VALUES (?, ?)'
+    _SQL_INSERT_VALUES_FROM_ROWS = 'INSERT OR IGNORE INTO {values_table_name} (name, value) SELECT DISTINCT ?, {column} FROM {table_name} WHERE {column} IS NOT NULL'
+    _SQL_DELETE_VALUES = 'DELETE FROM {table_name}'
 
     # ####################################################### #
 
@@ -39,13 +86,13 @@ class Index(Logger):
         self.directory = directory
         self.crawler = crawler
 
-        self._columns = columns
-        self._index = pandas.DataFrame([], columns=self._columns)
+        self._columns = list(columns or [])
+        self.segment_size = self.crawler.settings.getint('INDEX_SEGMENT_SIZE', 1000)
+        self._reset()
 
         Logger.__init__(self, self.crawler, directory=self.directory)
 
-        self.work_file = os.path.join(work_directory(self.crawler.settings), self.directory, self.name+'.csv')
-        create_file(self.work_file, 'w+', self._index.to_csv(index=False))
+        self.work_file = os.path.join(work_directory(self.crawler.settings), self.directory, self.name+'.sqlite')
 
         # self.logger.info(action='Initialisation', status='OK')
 
@@ -58,6 +105,7 @@ class Index(Logger):
     def infos(self):
         infos = super().infos
         infos['work_file'] = self.work_file
+        infos['segment_size'] = self.segment_size
         infos['counts'] = self.counts
         return infos
 
@@ -65,24 +113,47 @@ class Index(Logger):
 
     def open(self):
         # self.logger.debug(action='Open')
-        with open(self.work_file, 'r') as file:
-            self._index = pandas.read_csv(file)
-            file.close()
-        self.logger.debug(action='Open', status='OK', message='{}'.format(self.work_file))
+        self._reset()
+        if self.crawler.settings.get('WORK_ON_DISK', False):
+            create_directory(os.path.dirname(self.work_file))
+            self._conn = sqlite3.connect(self.work_file)
+            self._create()
+            self._import_legacy_file()
+        else:
+            self._conn = sqlite3.connect(':memory:')
+            self._create()
+        self._load_summary()
+        self.logger.debug(action='Open', status='OK', message='{}', message_args=(self.work_file,))
 
     def close(self):
         # self.logger.debug(action='Close')
-        if self.crawler.settings.get('WORK_ON_DISK', False):
-            with open(self.work_file, 'w+') as file:
-                file.write(self._index.to_csv(index=False))
-                file.close()
-        self.logger.debug(action='Close', status='OK', message='{}'.format(self.work_file))
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self.logger.debug(action='Close', status='OK', message='{}', message_args=(self.work_file,))
+
+    def flush(self):
+        """ Insert the buffered segment into the work file and update the summary. """
+
+        if self._conn is None or not len(self._timestamps):
+            return
+        rows = list(self._segment_rows(timestamps=True))
+        with self._conn:
+            self._conn.executemany(self._sql(self._SQL_INSERT), rows)
+            for index, column in enumerate(self._columns):
+                if column in self._summaries:
+                    self._summarize(column, collections.Counter(row[index] for row in rows))
+                else:
+                    self._distinct[column] += self._store_values(column, self._labels[column])
+            self._save_summary(self._length)
+        self._reset_segment()
 
     # ####################################################### #
     # ####################################################### #
 
     def __len__(self):
-        return len(self._index)
+        return self._length
 
     @property
     def length(self):
@@ -90,19 +161,244 @@ class Index(Logger):
 
     @property
     def counts(self):
-        return {column: self._index[column].nunique() for column in self._columns}
+        """ Distinct values of every column, including the rows not yet flushed. """
+
+        self.flush()
+        return {column: len(self._summaries[column]) if column in self._summaries else self._distinct[column] + len(self._labels[column]) for column in self._columns}
 
     @property
     def size(self):
-        return int(sizeof(self._index)/1000)
+        size = sum(column.buffer_info()[1] * column.itemsize for column in self._segment.values())
+        size += sum(sum(sys.getsizeof(value) for value in labels) for labels in self._labels.values())
+        size += sum(sys.getsizeof(values) for values in self._values.values())
+        return int(size/1000)
+
+    @property
+    def dataframe(self):
+        """ All the rows, materialized on demand. """
+
+        self.flush()
+        if self._conn is None:
+            return pandas.DataFrame(list(self._segment_rows(timestamps=True)), columns=self._columns + ['timestamp'])
+        chunks = pandas.read_sql_query(self._sql(self._SQL_SELECT, order='ASC'), self._conn, chunksize=self.segment_size)
+        return pandas.concat(chunks, ignore_index=True)
 
     # ####################################################### #
 
+    def scan(self, **criteria):
+        """ Rows whose columns equal the given values, most recent first, read by chunks. """
+
+        unknown = set(criteria) - set(self._columns)
+        if unknown:
+            raise KeyError('Unknown columns in {} : {}'.format(self.name, ', '.join(sorted(unknown))))
+        self.flush()
+        if self._conn is None:
+            return
+
+        where = ' WHERE ' + ' AND '.join('{} = ?'.format(column) for column in criteria) if criteria else ''
+        names = self._columns + ['timestamp']
+        cursor = self._conn.execute(self._sql(self._SQL_SELECT, where=where, order='DESC'), ['' if value is None else str(value) for value in criteria.values()])
+        try:
+            while True:
+                rows = cursor.fetchmany(self.segment_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(names, row))
+        finally:
+            cursor.close()
+
+    def lookup(self, limit=None, **criteria):
+        """ Rows whose columns equal the given values, most recent first. """
+
+        return list(itertools.islice(self.scan(**criteria), limit))
+
+    def last(self, **criteria):
+        """ Most recent row whose columns equal the given values, None if there is none. """
+
+        rows = self.lookup(limit=1, **criteria)
+        return rows[0] if rows else None
+
+    # ####################################################### #
+
+    def _sql(self, query, **kwargs):
+        params = {
+            'table_name': self._TABLE_NAME,
+            'columns': ', '.join(self._columns),
+            'definitions': ', '.join(column + ' TEXT' for column in self._columns),
+            'values': ', '.join('?' * len(self._columns)),
+            'where': ''
+            }
+        params.update(kwargs)
+        return query.format(**params)
+
+    def _create(self):
+        with self._conn:
+            self._conn.execute(self._sql(self._SQL_CREATE))
+            for column in self._columns:
+                if column in INDEXED_COLUMNS:
+                    self._conn.execute(self._SQL_CREATE_INDEX.format(index_name=self._TABLE_NAME + '_' + column, table_name=self._TABLE_NAME, column=column))
+            self._conn.execute(self._SQL_CREATE_SUMMARY.format(table_name=self._SUMMARY_TABLE_NAME))
+            self._conn.execute(self._SQL_CREATE_DISTINCT.format(table_name=self._DISTINCT_TABLE_NAME))
+            self._conn.execute(self._SQL_CREATE_VALUES.format(table_name=self._VALUES_TABLE_NAME))
+
+    def _import_legacy_file(self):
+        # Only called for the on-disk database: the legacy file is removed once its rows are committed to it
+        legacy_file = os.path.splitext(self.work_file)[0] + '.csv'
+        if self._conn is None or not os.path.exists(legacy_file):
+            return
+        with open(legacy_file, 'r', newline='') as file, self._conn:
+            reader = csv.DictReader(file)
+            while True:
+                rows = [[row.get(column) or '' for column in self._columns] + [None] for row in itertools.islice(reader, self.segment_size)]
+                if not rows:
+                    break
+                self._conn.executemany(self._sql(self._SQL_INSERT), rows)
+            self._conn.execute(self._SQL_DELETE_SUMMARY.format(table_name=self._SUMMARY_TABLE_NAME))
+        os.remove(legacy_file)
+        self.logger.info(action='Import', status='OK', message='{}'.format(legacy_file))
+
+    # ####################################################### #
+
+    def _load_summary(self):
+        summary = dict(self._conn.execute(self._SQL_SELECT_SUMMARY.format(table_name=self._SUMMARY_TABLE_NAME)))
+        if 'length' not in summary or any(self._distinct_key(column) not in summary for column in self._distinct):
+            summary = self._rebuild_summary()
+        self._length = summary.get('length', 0)
+        for column in self._distinct:
+            self._distinct[column] = summary[self._distinct_key(column)]
+        query = self._SQL_SELECT_DISTINCT.format(table_name=self._DISTINCT_TABLE_NAME)
+        for column, values in self._summaries.items():
+            values.update(self._conn.execute(query, (column,)))
+
+    def _rebuild_summary(self):
+        """ Summary of a file written without one, aggregated by sqlite. """
+
+        self.logger.info(action='Summary', message='{}'.format(self.work_file))
+        length = self._conn.execute(self._sql(self._SQL_COUNT)).fetchone()[0]
+        with self._conn:
+            self._conn.execute(self._SQL_DELETE_DISTINCT.format(table_name=self._DISTINCT_TABLE_NAME))
+            self._conn.execute(self._SQL_DELETE_VALUES.format(table_name=self._VALUES_TABLE_NAME))
+            for column in self._summaries:
+                self._summarize(column, dict(self._conn.execute(self._sql(self._SQL_COUNT_VALUES, column=column))))
+            for column in self._distinct:
+                query = self._sql(self._SQL_INSERT_VALUES_FROM_ROWS, values_table_name=self._VALUES_TABLE_NAME, column=column)
+                self._distinct[column] = self._conn.execute(query, (column,)).rowcount
+            self._save_summary(length)
+        return dict({self._distinct_key(column): count for column, count in self._distinct.items()}, length=length)
+
+    def _summarize(self, column, counter):
+        query = self._SQL_UPSERT_DISTINCT.format(table_name=self._DISTINCT_TABLE_NAME)
+        self._conn.executemany(query, [(column, value, count) for value, count in counter.items()])
+
+    def _store_values(self, column, labels):
+        # unbounded columns (urls, arguments...) : only the values sqlite did not already have are counted
+        query = self._SQL_INSERT_VALUES.format(table_name=self._VALUES_TABLE_NAME)
+        return self._conn.executemany(query, [(column, label) for label in labels]).rowcount
+
+    def _save_summary(self, length):
+        summary = [('length', length)] + [(self._distinct_key(column), count) for column, count in self._distinct.items()]
+        self._conn.executemany(self._SQL_REPLACE_SUMMARY.format(table_name=self._SUMMARY_TABLE_NAME), summary)
+
+    @staticmethod
+    def _distinct_key(column):
+        return 'distinct/' + column
+
+    # ####################################################### #
+
+    def _reset(self):
+        self._length = 0
+        self._summaries = {column: {} for column in self._columns if column in SUMMARIZED_COLUMNS}
+        self._distinct = {column: 0 for column in self._columns if column not in SUMMARIZED_COLUMNS}
+        self._reset_segment()
+
+    def _reset_segment(self):
+        # values as interned ids, only for the rows not yet flushed
+        self._values = {column: {} for column in self._columns}
+        self._labels = {column: [] for column in self._columns}
+        self._segment = {column: array(self._typecode(column)) for column in self._columns}
+        self._timestamps = array('d')
+
+    def _typecode(self, column):
+        return 'I'
+
+    def _intern(self, column, value):
+        value = '' if value is None else str(value)
+        values = self._values[column]
+        _id = values.get(value)
+        if _id is None:
+            _id = values[value] = len(values)
+            self._labels[column].append(value)
+        return _id
+
+    def _segment_rows(self, timestamps=False):
+        columns = [(self._labels[column], self._segment[column]) for column in self._columns]
+        for index, timestamp in enumerate(self._timestamps):
+            row = [labels[ids[index]] for labels, ids in columns]
+            if timestamps:
+                row.append(timestamp)
+            yield row
+
+    def _append(self, row):
+        for column in self._columns:
+            _id = self._intern(column, row.get(column))
+            self._segment[column].append(_id)
+            if column in self._summaries:
+                values = self._summaries[column]
+                label = self._labels[column][_id]
+                values[label] = values.get(label, 0) + 1
+        self._timestamps.append(time.time())
+        self._length += 1
+
     def add(self, **kwargs):
 
-        self._index = self._index.append(kwargs, ignore_index=True)
+        self._append(kwargs)
+        if len(self._timestamps) >= self.segment_size:
+            self.flush()
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(action='Index (+)', status='OK', message=json.dumps(kwargs, indent=None, sort_keys=False))
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+
+
+STATUS_LABELS = ('!', '_', 'False', 'True')
+
+
+class StatusIndex(Index):
+
+    """ Ratpy Status Index class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    @property
+    def counts(self):
+        return {label: count for label, count in self._summaries['status'].items() if count}
+
+    # ####################################################### #
+
+    def _reset(self):
+        super()._reset()
+        self._summaries['status'] = dict.fromkeys(STATUS_LABELS, 0)
+
+    def _reset_segment(self):
+        super()._reset_segment()
+        for label in STATUS_LABELS:
+            self._intern('status', label)
+
+    def _typecode(self, column):
+        # status as one byte code
+        return 'B' if column == 'status' else 'I'
 
-        self.logger.debug(action='Index (+)', status='OK', message='{}'.format(json.dumps(kwargs, indent=None, sort_keys=False)))
+    def _append(self, row):
+        label = '' if row.get('status') is None else str(row.get('status'))
+        if self._values['status'].get(label, len(self._labels['status'])) > 0xFF:
+            raise ValueError('Too many distinct status in {} : {}'.format(self.name, label))
+        super()._append(row)
 
     # ####################################################### #
     # ####################################################### #
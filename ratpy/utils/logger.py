@@ -1,9 +1,14 @@
 """ Ratpy Logger module """
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 
-from ratpy.utils.path import log_directory, create_file
+from ratpy.utils.path import log_directory, create_directory, create_file
 
 # ############################################################### #
 # ############################################################### #
@@ -66,60 +71,215 @@ class Logger:
 # ############################################################### #
 
 
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+
+    """ Ratpy Buffered Rotating File Handler class """
+
+    flush_interval = None
+
+    _last_flush = None
+
+    def __init__(self, filename, max_bytes=0, backup_count=0, flush_interval=1000, encoding=None):
+        logging.handlers.RotatingFileHandler.__init__(self, filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.flush_interval = flush_interval / 1000
+        self._last_flush = time.monotonic()
+
+    def emit(self, record):
+        logging.handlers.RotatingFileHandler.emit(self, record)
+        if record.levelno >= logging.ERROR:
+            self.force_flush()
+
+    def flush(self):
+        # called after every record, only flush at the given interval
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.force_flush()
+
+    def force_flush(self):
+        logging.handlers.RotatingFileHandler.flush(self)
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.force_flush()
+        logging.handlers.RotatingFileHandler.close(self)
+
+# ############################################################### #
+
+
+class LogListener(logging.handlers.QueueListener):
+
+    """ Ratpy Log Listener class """
+
+    timeout = None
+
+    def __init__(self, _queue, handler, timeout=1.0):
+        logging.handlers.QueueListener.__init__(self, _queue, handler)
+        self.timeout = timeout
+
+    def dequeue(self, block):
+        # flush the buffered files from the writer thread while the queue stays idle
+        while True:
+            try:
+                return self.queue.get(block, timeout=self.timeout)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.flush()
+
+# ############################################################### #
+
+
+class LogRouter(logging.Handler):
+
+    """ Ratpy Log Router class """
+
+    # ####################################################### #
+    # ####################################################### #
+
+    _queue = None
+    _listener = None
+    _handlers = None
+    _lock = None
+
+    # ####################################################### #
+
+    def __init__(self):
+
+        logging.Handler.__init__(self)
+        # one queue for the router lifetime : the queue handlers of the loggers keep pointing to it across restarts
+        self._queue = queue.SimpleQueue()
+        self._handlers = {}
+        self._lock = threading.Lock()
+
+    # ####################################################### #
+
+    @property
+    def infos(self):
+        return {'running': self._listener is not None, 'files': sorted(self._handlers)}
+
+    # ####################################################### #
+    # ####################################################### #
+
+    def register(self, logger, settings, files):
+        """ Route the records of the logger to the files [(path, level)], written by a background thread. """
+
+        destinations = []
+        with self._lock:
+            for path, level in files:
+                path = os.path.abspath(path)
+                if path not in self._handlers:
+                    create_directory(os.path.dirname(path))
+                    handler = BufferedRotatingFileHandler(
+                        path,
+                        max_bytes=settings.getint('LOG_FILE_MAX_BYTES', 0),
+                        backup_count=settings.getint('LOG_FILE_BACKUP_COUNT', 0),
+                        flush_interval=settings.getint('LOG_FLUSH_INTERVAL', 1000),
+                        encoding=settings.get('LOG_ENCODING')
+                        )
+                    handler.setFormatter(logging.Formatter(fmt=settings.get('LOG_FORMAT'), datefmt=settings.get('LOG_DATEFORMAT')))
+                    self._handlers[path] = handler
+                destinations.append((path, logging.getLevelName(level) if isinstance(level, str) else level))
+
+            if self._listener is None:
+                self._listener = LogListener(self._queue, self, timeout=settings.getint('LOG_FLUSH_INTERVAL', 1000) / 1000 or None)
+                self._listener.start()
+
+        # one queue handler per logger name, whatever the number of instances sharing it
+        if not any(isinstance(handler, logging.handlers.QueueHandler) for handler in logger.handlers):
+            logger.addHandler(logging.handlers.QueueHandler(self._queue))
+
+        return tuple(destinations)
+
+    def handle(self, record):
+        for path, level in getattr(record, 'ratpy_destinations', ()):
+            if record.levelno >= level:
+                self._handlers[path].handle(record)
+        return True
+
+    def flush(self):
+        for handler in list(self._handlers.values()):
+            handler.flush()
+
+    def stop(self):
+        with self._lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+            # closed files are opened again by their next record
+            for handler in self._handlers.values():
+                handler.close()
+
+    # ####################################################### #
+    # ####################################################### #
+
+# ############################################################### #
+
+LOG_ROUTER = LogRouter()
+atexit.register(LOG_ROUTER.stop)
+
+# ############################################################### #
+
+
 def create_logger(obj):
 
     class _Logger:
 
+        _extra = None
+
         def __init__(self):
 
             name_pattern = '{:_<' + str(obj.crawler.settings.getint('LOG_NAME_SIZE')) + '}'
             self._logger = logging.getLogger(name_pattern.format(obj.name))
 
-            formatter = logging.Formatter(
-                fmt=obj.crawler.settings.get('LOG_FORMAT'),
-                datefmt=obj.crawler.settings.get('LOG_DATEFORMAT')
-            )
-
             if not obj.crawler.settings.getbool('LOG_ENABLED'):
                 self._logger.handlers = []
                 handler = logging.NullHandler()
                 self._logger.addHandler(handler)
 
+            files = []
             if obj.crawler.settings.get('LOG_IN_FILES'):
-                handler = logging.FileHandler(obj.log_file, encoding=obj.crawler.settings.get('LOG_ENCODING'))
-                handler.setFormatter(formatter)
-                handler.setLevel(obj.crawler.settings.get('LOG_LEVEL_IN_FILES'))
-                self._logger.addHandler(handler)
-
+                files.append((obj.log_file, obj.crawler.settings.get('LOG_LEVEL_IN_FILES')))
             if obj.crawler.settings.get('LOG_IN_ONE_FILE'):
-                handler_all = logging.FileHandler(os.path.join(log_directory(obj.crawler.settings), 'ratpy.log'), encoding=obj.crawler.settings.get('LOG_ENCODING'))
-                handler_all.setFormatter(formatter)
-                handler_all.setLevel(obj.crawler.settings.get('LOG_LEVEL_IN_ONE_FILE'))
-                self._logger.addHandler(handler_all)
+                files.append((os.path.join(log_directory(obj.crawler.settings), 'ratpy.log'), obj.crawler.settings.get('LOG_LEVEL_IN_ONE_FILE')))
+            if files:
+                self._extra = {'ratpy_destinations': LOG_ROUTER.register(self._logger, obj.crawler.settings, files)}
+
+        def isEnabledFor(self, level):  # pylint: disable=invalid-name
+            return self._logger.isEnabledFor(level)
+
+        # messages are only formatted for the records that will be emitted :
+        # pass message_args=(...) instead of calling message.format(...)
 
-        def debug(self, *args, action=None, status=None, message='', **kwargs):
-            self._log(logging.DEBUG, *args, action=action, status=status, message=message, **kwargs)
+        def debug(self, *args, **kwargs):
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._log(logging.DEBUG, *args, **kwargs)
 
-        def info(self, *args, action=None, status=None, message='', **kwargs):
-            self._log(logging.INFO, *args, action=action, status=status, message=message, **kwargs)
+        def info(self, *args, **kwargs):
+            if self._logger.isEnabledFor(logging.INFO):
+                self._log(logging.INFO, *args, **kwargs)
 
-        def warning(self, *args, action=None, status=None, message='', **kwargs):
-            self._log(logging.WARNING, *args, action=action, status=status, message=message, **kwargs)
+        def warning(self, *args, **kwargs):
+            if self._logger.isEnabledFor(logging.WARNING):
+                self._log(logging.WARNING, *args, **kwargs)
 
-        def error(self, *args, action=None, status=None, message='', **kwargs):
-            self._log(logging.ERROR, *args, action=action, status=status, message=message, **kwargs)
+        def error(self, *args, **kwargs):
+            if self._logger.isEnabledFor(logging.ERROR):
+                self._log(logging.ERROR, *args, **kwargs)
 
-        def critical(self, *args, action=None, status=None, message='', **kwargs):
-            self._log(logging.CRITICAL, *args, action=action, status=status, message=message, **kwargs)
+        def critical(self, *args, **kwargs):
+            if self._logger.isEnabledFor(logging.CRITICAL):
+                self._log(logging.CRITICAL, *args, **kwargs)
 
-        def _log(self, level, *args, action=None, status=None, message='', **kwargs):
+        def _log(self, level, *args, action=None, status=None, message='', message_args=(), **kwargs):
 
             if action is not None:
+                if message_args:
+                    message = message.format(*message_args)
                 if status is not None:
-                    self._logger.log(level, '{:_<18} : {: <5} {}'.format(action, status, message))
+                    self._logger.log(level, '{:_<18} : {: <5} {}'.format(action, status, message), extra=self._extra)
                 else:
-                    self._logger.log(level, '{:_<18}         {}'.format(action, message))
+                    self._logger.log(level, '{:_<18}         {}'.format(action, message), extra=self._extra)
             else:
+                if self._extra is not None:
+                    kwargs['extra'] = dict(kwargs.get('extra') or {}, **self._extra)
                 self._logger.log(level, *args, **kwargs)
 
     return _Logger()